@@ -0,0 +1,297 @@
+#----------------------------------------------------------------------------#
+# JSON API (v1).
+#----------------------------------------------------------------------------#
+
+# Read-only JSON over the registered resources:
+#
+#   GET /api/v1/<resource>?fields=id,name&city=Austin&after=40&limit=50
+#   GET /api/v1/<resource>?format=ndjson        (streams every match)
+#   GET /api/v1/<resource>/<id>
+#
+# Pages use the same keyset cursor on id as the HTML listings. The NDJSON
+# mode reads through a server-side cursor in fixed-size chunks, so an
+# export of the whole table runs in constant memory.
+
+import json
+from datetime import date, datetime
+
+from flask import Blueprint, Response, abort, current_app, jsonify, request, stream_with_context, url_for
+
+from models import Genre, Venue, Artist, Show, venue_genres, artist_genres
+
+api = Blueprint('api_v1', __name__, url_prefix='/api/v1')
+
+RESOURCES = {}
+
+RESERVED_ARGS = {'fields', 'after', 'limit', 'format'}
+
+STREAM_CHUNK_SIZE = 1000
+
+
+class Resource:
+
+    # fields maps output names to columns; filters maps query-string names
+    # to functions building a criterion from the value; related maps
+    # output names to loaders that take a list of ids and return
+    # {id: value} with one query per chunk of rows.
+    def __init__(self, model, fields, filters=None, related=None, criteria=()):
+        self.model = model
+        self.fields = fields
+        self.filters = filters or {}
+        self.related = related or {}
+        self.criteria = criteria
+
+    def field_names(self):
+        return list(self.fields) + list(self.related)
+
+    def query(self, session, names):
+        columns = [self.model.id.label('id')]
+        columns += [self.fields[name].label(name) for name in names if name in self.fields and name != 'id']
+        return session.query(*columns).filter(*self.criteria).order_by(self.model.id)
+
+    # Rows as dicts of plain column values plus the related lists.
+    def items(self, rows, names):
+        ids = [row.id for row in rows]
+        related = {name: self.related[name](ids) for name in names if name in self.related and ids}
+        for row in rows:
+            item = {}
+            for name in names:
+                if name in self.related:
+                    item[name] = related.get(name, {}).get(row.id, [])
+                else:
+                    item[name] = getattr(row, name)
+            yield item
+
+    def serialize(self, rows, names):
+        for item in self.items(rows, names):
+            yield {name: encode(value) for name, value in item.items()}
+
+
+def register_resource(name, resource):
+    RESOURCES[name] = resource
+
+
+def encode(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def db_session():
+    return current_app.extensions['sqlalchemy'].session
+
+
+def resource_named(name):
+    if name not in RESOURCES:
+        abort(404)
+    return RESOURCES[name]
+
+
+def selected_fields(resource):
+    requested = request.args.get('fields')
+    if not requested:
+        return resource.field_names()
+    names = [name.strip() for name in requested.split(',') if name.strip()]
+    unknown = [name for name in names if name not in resource.field_names()]
+    if unknown:
+        abort(400, 'Unknown fields: {}'.format(', '.join(unknown)))
+    return names
+
+
+def filtered(resource, query):
+    for name, value in request.args.items():
+        if name in RESERVED_ARGS:
+            continue
+        if name not in resource.filters:
+            abort(400, 'Cannot filter on {}'.format(name))
+        try:
+            query = query.filter(resource.filters[name](value))
+        except ValueError:
+            abort(400, 'Invalid value for {}'.format(name))
+    return query
+
+
+def wants_ndjson():
+    return (request.args.get('format') == 'ndjson'
+            or request.accept_mimetypes.best == 'application/x-ndjson')
+
+
+#  Routes
+#  ----------------------------------------------------------------
+
+@api.route('/<name>')
+def list_resource(name):
+    resource = resource_named(name)
+    names = selected_fields(resource)
+    query = filtered(resource, resource.query(db_session(), names))
+
+    after = request.args.get('after', type=int)
+    if after is not None:
+        query = query.filter(resource.model.id > after)
+
+    if wants_ndjson():
+        limit = request.args.get('limit', type=int)
+        if limit is not None:
+            query = query.limit(limit)
+        return Response(stream_with_context(stream(resource, query, names)),
+                        mimetype='application/x-ndjson')
+
+    limit = request.args.get('limit', current_app.config['PAGE_SIZE'], type=int)
+    limit = max(1, min(limit, current_app.config['MAX_PAGE_SIZE']))
+    rows = query.limit(limit + 1).all()
+    page = rows[:limit]
+
+    next_url = None
+    if len(rows) > limit:
+        args = dict(request.args, after=page[-1].id)
+        next_url = url_for('api_v1.list_resource', name=name, **args)
+
+    return jsonify({
+        'data': list(resource.serialize(page, names)),
+        'next': next_url,
+    })
+
+
+@api.route('/<name>/<int:item_id>')
+def get_resource(name, item_id):
+    resource = resource_named(name)
+    names = selected_fields(resource)
+    row = resource.query(db_session(), names).filter(resource.model.id == item_id).first()
+    if row is None:
+        abort(404)
+
+    return jsonify(next(resource.serialize([row], names)))
+
+
+def stream(resource, query, names):
+    # yield_per makes the driver use a server-side cursor and hand rows
+    # over in chunks instead of loading the whole result first.
+    chunk = []
+    for row in query.yield_per(STREAM_CHUNK_SIZE):
+        chunk.append(row)
+        if len(chunk) == STREAM_CHUNK_SIZE:
+            yield from lines(resource, chunk, names)
+            chunk = []
+    if chunk:
+        yield from lines(resource, chunk, names)
+
+
+def lines(resource, chunk, names):
+    for item in resource.serialize(chunk, names):
+        yield json.dumps(item) + '\n'
+
+
+#  Errors
+#  ----------------------------------------------------------------
+
+@api.errorhandler(400)
+@api.errorhandler(404)
+def api_error(error):
+    return jsonify({'error': error.description}), error.code
+
+
+#  Resources
+#  ----------------------------------------------------------------
+
+def genres_by_id(link_table, key):
+    # Batched genre lookup for a chunk of API rows: one query per chunk.
+    def load(ids):
+        rows = (
+            db_session().query(link_table.c[key], Genre.name)
+            .join(Genre, Genre.id == link_table.c.genre_id)
+            .filter(link_table.c[key].in_(ids))
+            .order_by(Genre.name)
+        )
+        genres = {}
+        for entity_id, name in rows:
+            genres.setdefault(entity_id, []).append(name)
+        return genres
+    return load
+
+
+def as_bool(value):
+    if value.lower() in ('1', 'true', 'yes'):
+        return True
+    if value.lower() in ('0', 'false', 'no'):
+        return False
+    raise ValueError(value)
+
+
+register_resource('venues', Resource(
+    Venue,
+    fields={
+        'id':                   Venue.id,
+        'name':                 Venue.name,
+        'city':                 Venue.city,
+        'state':                Venue.state,
+        'address':              Venue.address,
+        'phone':                Venue.phone,
+        'image_link':           Venue.image_link,
+        'website_link':         Venue.website_link,
+        'facebook_link':        Venue.facebook_link,
+        'seeking_talent':       Venue.seeking,
+        'seeking_description':  Venue.seeking_comment,
+        'upcoming_show_count':  Venue.upcoming_show_count,
+        'past_show_count':      Venue.past_show_count,
+        'next_show_at':         Venue.next_show_at,
+        'updated_at':           Venue.updated_at,
+    },
+    related={
+        'genres':               genres_by_id(venue_genres, 'venue_id'),
+    },
+    filters={
+        'city':                 lambda value: Venue.city == value,
+        'state':                lambda value: Venue.state == value,
+        'genre':                lambda value: Venue.genres.any(Genre.name == value),
+        'seeking_talent':       lambda value: Venue.seeking == as_bool(value),
+    },
+    criteria=[Venue.city != 'N/A'],
+))
+
+
+register_resource('artists', Resource(
+    Artist,
+    fields={
+        'id':                   Artist.id,
+        'name':                 Artist.name,
+        'city':                 Artist.city,
+        'state':                Artist.state,
+        'phone':                Artist.phone,
+        'image_link':           Artist.image_link,
+        'website_link':         Artist.website_link,
+        'facebook_link':        Artist.facebook_link,
+        'seeking_venue':        Artist.seeking,
+        'seeking_description':  Artist.seeking_comment,
+        'upcoming_show_count':  Artist.upcoming_show_count,
+        'past_show_count':      Artist.past_show_count,
+        'next_show_at':         Artist.next_show_at,
+        'updated_at':           Artist.updated_at,
+    },
+    related={
+        'genres':               genres_by_id(artist_genres, 'artist_id'),
+    },
+    filters={
+        'city':                 lambda value: Artist.city == value,
+        'state':                lambda value: Artist.state == value,
+        'genre':                lambda value: Artist.genres.any(Genre.name == value),
+        'seeking_venue':        lambda value: Artist.seeking == as_bool(value),
+    },
+    criteria=[Artist.city != 'N/A'],
+))
+
+
+register_resource('shows', Resource(
+    Show,
+    fields={
+        'id':                   Show.id,
+        'venue_id':             Show.venue_id,
+        'artist_id':            Show.artist_id,
+        'start_time':           Show.date,
+        'updated_at':           Show.updated_at,
+    },
+    filters={
+        'venue_id':             lambda value: Show.venue_id == int(value),
+        'artist_id':            lambda value: Show.artist_id == int(value),
+        'upcoming':             lambda value: (Show.date > datetime.now()) if as_bool(value) else (Show.date <= datetime.now()),
+    },
+))
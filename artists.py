@@ -0,0 +1,295 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import sys
+from datetime import datetime
+from flask import Blueprint, render_template, request, flash, redirect, url_for, jsonify
+from sqlalchemy.orm import selectinload
+from models import db, Artist, Show, genres_named, remove_entities
+from extensions import search_backend, response_cache, replicas
+from pages import listing_filters, page_size, id_cursor, split_page, entity_version, is_not_modified, versioned_response
+
+bp = Blueprint('artists', __name__)
+
+
+#----------------------------------------------------------------------------#
+# Controllers.
+#----------------------------------------------------------------------------#
+
+#  List Artists
+#  ----------------------------------------------------------------
+
+@bp.route('/artists')
+@response_cache.cached('artists')
+@replicas.read_only
+def artists():
+
+  data=[]
+
+  artists = (
+    db.session.query(Artist)
+    .with_entities(Artist.id, Artist.name)
+    .filter(Artist.city != "N/A")
+    .order_by(Artist.id)
+  )
+
+  artists = listing_filters(artists, Artist)
+
+  after = id_cursor()
+  if after is not None:
+    artists = artists.filter(Artist.id > after)
+
+  limit = page_size()
+  artists, has_next = split_page(artists.limit(limit + 1).all(), limit)
+
+  for artist in artists:
+
+    artist_data = {
+      "id": artist.id,
+      "name": artist.name,
+    }
+
+    data.append(artist_data)
+
+  next_after = artists[-1].id if has_next else None
+
+  return render_template('pages/artists.html', artists=data, next_after=next_after)
+
+
+#  Search Artists
+#  ----------------------------------------------------------------
+
+@bp.route('/artists/search', methods=['POST'])
+@replicas.read_only
+def search_artists():
+
+  search_term = request.form.get('search_term', '')
+
+  count, data = search_backend.search(Artist, search_term, page_size())
+
+  response={
+    "count": count,
+    "data": data
+  }
+
+  return render_template('pages/search_artists.html', results=response, search_term=request.form.get('search_term', ''))
+
+
+#  Display Artists
+#  ----------------------------------------------------------------
+
+@bp.route('/artists/<int:artist_id>')
+@response_cache.cached()
+@replicas.read_only
+def show_artist(artist_id):
+
+  etag, last_modified = entity_version(Artist, artist_id)
+  if is_not_modified(etag, last_modified):
+    return versioned_response(('', 304), etag, last_modified)
+  
+  artist = (
+    db.session.query(Artist)
+    .options(selectinload(Artist.shows).joinedload(Show.venue))
+    .filter(Artist.id == artist_id)
+    .first_or_404()
+  )
+  
+  shows_past = []
+  shows_upcoming = []
+
+  now = datetime.now()
+
+  for show in artist.shows:
+
+    show_info = {
+      "id": show.id,
+      "venue_id": show.venue.id,
+      "venue_name": show.venue.name,
+      "venue_image_link": show.venue.image_link,
+      "start_time": show.date
+    }
+
+    if show.date < now:
+      shows_past.append(show_info)
+    else:
+      shows_upcoming.append(show_info)
+
+  response_cache.tag(
+    'artist:{}'.format(artist.id),
+    'artist-shows:{}'.format(artist.id),
+    *('venue:{}'.format(show.venue_id) for show in artist.shows)
+  )
+
+  # Counted from the rendered lists, not the stored counters; see
+  # show_venue() in venues.py.
+  shows_past_len = len(shows_past)
+  shows_upcoming_len = len(shows_upcoming)
+  
+  data={
+    "id": artist.id,
+    "name": artist.name,
+    "genres": [genre.name for genre in artist.genres],
+    "city": artist.city,
+    "state": artist.state,
+    "phone": artist.phone,
+    "website": artist.website_link,
+    "facebook_link": artist.facebook_link,
+    "seeking_venue": artist.seeking,
+    "seeking_description": artist.seeking_comment,
+    "image_link": artist.image_link,
+    "past_shows": shows_past,
+    "upcoming_shows": shows_upcoming,
+    "past_shows_count": shows_past_len,
+    "upcoming_shows_count": shows_upcoming_len,
+  }
+
+  return versioned_response(render_template('pages/show_artist.html', artist=data), etag, last_modified)
+
+
+#  Create Artist
+#  ----------------------------------------------------------------
+
+@bp.route('/artists/create', methods=['GET'])
+def create_artist_form():
+  from forms import ArtistForm
+  form = ArtistForm()
+  return render_template('forms/new_artist.html', form=form)
+
+@bp.route('/artists/create', methods=['POST'])
+def create_artist_submission():
+  from forms import ArtistForm
+
+  form = ArtistForm(request.form)
+
+  error = False
+
+  try:
+
+    artist = Artist(
+      name =              form.name.data,
+      city =              form.city.data,
+      state =             form.state.data,
+      phone =             form.phone.data,
+      genres =            genres_named(form.genres.data),
+      image_link =        form.image_link.data,
+      facebook_link =     form.facebook_link.data,
+      website_link =      form.website_link.data,
+      seeking =           form.seeking_venue.data,
+      seeking_comment =   form.seeking_description.data
+    )
+
+    db.session.add(artist)
+    db.session.commit()
+
+    flash('Artist ' + artist.name + ' was successfully listed!')
+  except:
+    db.session.rollback()
+    error=True
+    flash('An error occurred. Artist could not be listed.')
+    print(sys.exc_info())
+  finally:
+    db.session.close()
+  if error:
+    return render_template('pages/home.html')
+  else:
+    return redirect(url_for('artists.show_artist', artist_id=artist.id))
+
+
+#  Delete Artist
+#  ----------------------------------------------------------------
+@bp.route('/artists/<artist_id>', methods=['DELETE'])
+def delete_artist(artist_id):
+
+  error = False
+
+  try:
+    remove_entities(Artist, [artist_id])
+    db.session.commit()
+    flash('Artist deleted successfully!')
+  except:
+    db.session.rollback()
+    error = True
+    flash('There was a problem deleting the Artist!!')
+    print(sys.exc_info())
+  finally:
+    db.session.close()
+  if error:
+    return jsonify({ 'success': False })
+  else:
+    return jsonify({ 'success': True })
+
+
+#  Update Artist
+#  ----------------------------------------------------------------
+@bp.route('/artists/<int:artist_id>/edit', methods=['GET'])
+def edit_artist(artist_id):
+  from forms import ArtistForm
+
+  artist = Artist.query.get(artist_id)
+
+  form = ArtistForm(
+    name =                  artist.name,
+    city =                  artist.city,
+    state =                 artist.state,
+    phone =                 artist.phone,
+    genres =                [genre.name for genre in artist.genres],
+    image_link =            artist.image_link,
+    facebook_link =         artist.facebook_link,
+    website_link =          artist.website_link,
+    seeking_venue =         artist.seeking,
+    seeking_description =   artist.seeking_comment
+  )
+
+  return render_template('forms/edit_artist.html', form=form, artist=artist)
+
+
+@bp.route('/artists/<int:artist_id>/edit', methods=['POST'])
+def edit_artist_submission(artist_id):
+  from forms import ArtistForm
+
+  form = ArtistForm(request.form)
+  artist = Artist.query.get(artist_id)
+  
+  error = False
+
+  artist_update = Artist(
+    name =              form.name.data,
+    city =              form.city.data,
+    state =             form.state.data,
+    phone =             form.phone.data,
+    genres =            genres_named(form.genres.data),
+    image_link =        form.image_link.data,
+    facebook_link =     form.facebook_link.data,
+    website_link =      form.website_link.data,
+    seeking =           form.seeking_venue.data,
+    seeking_comment =   form.seeking_description.data
+  )
+
+  try:
+    artist.name =              artist_update.name
+    artist.city =              artist_update.city
+    artist.state =             artist_update.state
+    artist.phone =             artist_update.phone
+    artist.genres =            artist_update.genres
+    artist.image_link =        artist_update.image_link
+    artist.facebook_link =     artist_update.facebook_link
+    artist.website_link =      artist_update.website_link
+    artist.seeking =           artist_update.seeking
+    artist.seeking_comment =   artist_update.seeking_comment
+    artist.updated_at =        datetime.utcnow()
+
+    db.session.commit()
+
+    flash('Artist ' + artist.name + ' was successfully updated!')
+  except:
+    db.session.rollback()
+    error = True
+    flash('An error occured. The artist could not be updated.')
+    print(sys.exc_info())
+  finally:
+    db.session.close()
+  if error:
+    return render_template('/artist/' + artist_id + '/edit')
+  else: 
+    return redirect(url_for('artists.show_artist', artist_id=artist_id))
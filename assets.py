@@ -0,0 +1,209 @@
+#----------------------------------------------------------------------------#
+# Static assets.
+#----------------------------------------------------------------------------#
+
+# The stylesheets and scripts the layout loads are served as three
+# bundles. `flask assets build` concatenates and minifies each one, writes
+# it to static/dist/ under a content-hashed name with .gz (and, with the
+# brotli package installed, .br) variants next to it, and records the
+# names in static/dist/manifest.json:
+#
+#   {{ asset_url('main.css') }}  ->  /static/dist/main.3f9c2e1a0b7d.css
+#
+# Hashed files never change, so they are sent with a year-long immutable
+# Cache-Control, precompressed when the client accepts it. Without a build
+# (e.g. in development) asset_url() points at the bundle name and the
+# bundle is assembled from the sources on each request, uncached.
+#
+# Minification uses rcssmin/rjsmin when installed. Otherwise CSS gets a
+# built-in comment and whitespace stripper and scripts are concatenated
+# as they are; files already named *.min.* are never touched.
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+
+from flask import Blueprint, Response, current_app, request, send_from_directory, url_for
+from werkzeug.security import safe_join
+
+# Bundles in load order. They sit in static/dist/, one level below static/
+# like css/ and js/, so relative url()s in the stylesheets still resolve.
+BUNDLES = {
+    'main.css': [
+        'css/bootstrap.min.css',
+        'css/layout.main.css',
+        'css/main.css',
+        'css/main.responsive.css',
+        'css/main.quickfix.css',
+    ],
+    'head.js': [
+        'js/libs/modernizr-2.8.2.min.js',
+        'js/libs/moment.min.js',
+    ],
+    # Deferred, so it runs after jQuery, in this order.
+    'app.js': [
+        'js/script.js',
+        'js/libs/bootstrap-3.1.1.min.js',
+        'js/plugins.js',
+    ],
+}
+
+DIST = 'dist'
+MANIFEST = 'manifest.json'
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+CSS_TOKENS = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')|/\*.*?\*/', re.S)
+CSS_SPACE = re.compile(r'\s+')
+CSS_PUNCTUATION = re.compile(r' ?([{};,>]) ?')
+
+
+#  Minification
+#  ----------------------------------------------------------------
+
+def strip_css(text):
+    # Strings are kept verbatim; comments go, and whitespace outside
+    # strings collapses to a single space or none around punctuation.
+    output = []
+    position = 0
+    for match in CSS_TOKENS.finditer(text):
+        output.append(CSS_PUNCTUATION.sub(r'\1', CSS_SPACE.sub(' ', text[position:match.start()])))
+        if match.group(1):
+            output.append(match.group(1))
+        position = match.end()
+    output.append(CSS_PUNCTUATION.sub(r'\1', CSS_SPACE.sub(' ', text[position:])))
+    return ''.join(output).strip()
+
+
+def minify(path, text):
+    if '.min.' in os.path.basename(path):
+        return text
+    if path.endswith('.css'):
+        try:
+            import rcssmin
+        except ImportError:
+            return strip_css(text)
+        return rcssmin.cssmin(text)
+    try:
+        import rjsmin
+    except ImportError:
+        return text
+    return rjsmin.jsmin(text)
+
+
+#  Building
+#  ----------------------------------------------------------------
+
+def bundle_content(static_folder, name, minified=True):
+    parts = []
+    for source in BUNDLES[name]:
+        with open(os.path.join(static_folder, source), encoding='utf-8') as file:
+            text = file.read()
+        parts.append(minify(source, text) if minified else text)
+    # A script missing its trailing semicolon must not run into the next.
+    separator = '\n' if name.endswith('.css') else ';\n'
+    return separator.join(parts).encode('utf-8')
+
+
+def write_file(path, content):
+    with open(path + '.tmp', 'wb') as file:
+        file.write(content)
+    os.replace(path + '.tmp', path)
+
+
+# Old builds are left in place: pages rendered (or cached) before a deploy
+# keep working while they still reference them.
+def build(static_folder, minified=True, compress=True):
+    dist = os.path.join(static_folder, DIST)
+    os.makedirs(dist, exist_ok=True)
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+
+    manifest = {}
+    for name in BUNDLES:
+        content = bundle_content(static_folder, name, minified)
+        stem, extension = os.path.splitext(name)
+        filename = '{}.{}{}'.format(stem, hashlib.sha256(content).hexdigest()[:12], extension)
+        path = os.path.join(dist, filename)
+        write_file(path, content)
+        if compress:
+            write_file(path + '.gz', gzip.compress(content, 9, mtime=0))
+            if brotli is not None:
+                write_file(path + '.br', brotli.compress(content))
+        manifest[name] = '{}/{}'.format(DIST, filename)
+
+    write_file(os.path.join(dist, MANIFEST), json.dumps(manifest, indent=2).encode('utf-8'))
+    return manifest
+
+
+def read_manifest(static_folder):
+    path = os.path.join(static_folder, DIST, MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as file:
+        return json.load(file)
+
+
+#  Serving
+#  ----------------------------------------------------------------
+
+bp = Blueprint('assets', __name__)
+
+
+class Assets:
+
+    def __init__(self, app=None):
+        self.manifest = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.manifest = read_manifest(app.static_folder)
+        app.jinja_env.globals['asset_url'] = self.url
+        app.register_blueprint(bp)
+        app.extensions['assets'] = self
+
+    def url(self, name):
+        if name in self.manifest:
+            return url_for('static', filename=self.manifest[name])
+        if name in BUNDLES:
+            return url_for('static', filename='{}/{}'.format(DIST, name))
+        return url_for('static', filename=name)
+
+    def build(self, static_folder, minified=True, compress=True):
+        self.manifest = build(static_folder, minified, compress)
+        return self.manifest
+
+
+# More specific than Flask's own /static/<path:filename>, so it wins for
+# everything under static/dist/.
+@bp.route('/static/dist/<path:filename>')
+def dist_file(filename):
+    directory = os.path.join(current_app.static_folder, DIST)
+
+    if filename in BUNDLES and not os.path.exists(os.path.join(directory, filename)):
+        response = Response(bundle_content(current_app.static_folder, filename, minified=False),
+                            mimetype=mimetypes.guess_type(filename)[0])
+        response.cache_control.no_cache = True
+        return response
+
+    max_age = None if filename == MANIFEST else IMMUTABLE_MAX_AGE
+    response = None
+    for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+        path = safe_join(directory, filename + suffix)
+        if request.accept_encodings[encoding] and path and os.path.isfile(path):
+            response = send_from_directory(directory, filename + suffix, max_age=max_age,
+                                           mimetype=mimetypes.guess_type(filename)[0])
+            response.headers['Content-Encoding'] = encoding
+            break
+    if response is None:
+        response = send_from_directory(directory, filename, max_age=max_age)
+
+    response.vary.add('Accept-Encoding')
+    if max_age is not None:
+        response.cache_control.immutable = True
+    return response
@@ -0,0 +1,73 @@
+#----------------------------------------------------------------------------#
+# Date formatting benchmark.
+#----------------------------------------------------------------------------#
+
+# Compares the `datetime` filter as it used to be (dateutil parse plus
+# babel.dates.format_datetime per call) with dates.py, on a /shows-like
+# page: many tiles sharing fewer distinct start times.
+#
+#   python bench_dates.py --tiles 5000 --distinct 500 --format full
+
+import argparse
+import random
+import timeit
+from datetime import datetime, timedelta
+
+import dates
+
+
+def legacy_format(value, format, locale):
+    import babel.dates
+    import dateutil.parser
+    if isinstance(value, str):
+        value = dateutil.parser.parse(value)
+    return babel.dates.format_datetime(value, format, locale=locale)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time the datetime filter.')
+    parser.add_argument('--tiles', type=int, default=5000)
+    parser.add_argument('--distinct', type=int, default=500)
+    parser.add_argument('--format', default='full')
+    parser.add_argument('--locale', default='en')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    random.seed(0)
+    start = datetime(2019, 1, 1, 18)
+    times = [start + timedelta(hours=random.randint(0, 24 * 365)) for _ in range(args.distinct)]
+    values = [random.choice(times) for _ in range(args.tiles)]
+    strings = [value.isoformat() for value in values]
+
+    expected = [legacy_format(value, args.format, args.locale) for value in values]
+    assert [dates.format_datetime(value, args.format, args.locale) for value in values] == expected
+    assert [dates.format_datetime(value, args.format, args.locale) for value in strings] == expected
+
+    def cold(function):
+        # Cleared before each run, so only compiled patterns carry over
+        # between pages, as with distinct values on every page.
+        def run():
+            dates.format_cached.cache_clear()
+            function()
+        return run
+
+    cases = [
+        ('babel per call (datetime)', lambda: [legacy_format(v, args.format, args.locale) for v in values]),
+        ('babel per call (string)', lambda: [legacy_format(v, args.format, args.locale) for v in strings]),
+        ('filter, cold value cache', cold(lambda: [dates.format_datetime(v, args.format, args.locale) for v in values])),
+        ('filter, warm value cache', lambda: [dates.format_datetime(v, args.format, args.locale) for v in values]),
+        ('filter (string)', lambda: [dates.format_datetime(v, args.format, args.locale) for v in strings]),
+    ]
+
+    baseline = None
+    print('{} tiles, {} distinct times, format {!r}, locale {}'.format(
+        args.tiles, args.distinct, args.format, args.locale))
+    for name, function in cases:
+        best = min(timeit.repeat(function, number=1, repeat=args.repeat))
+        baseline = baseline or best
+        print('{:<28} {:8.2f} ms  {:6.2f} us/tile  {:6.1f}x'.format(
+            name, best * 1000, best / args.tiles * 1e6, baseline / best))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+#----------------------------------------------------------------------------#
+# Startup benchmark.
+#----------------------------------------------------------------------------#
+
+# Measures what a fresh worker pays before serving: importing the app,
+# create_app() and the first GET /. Each run is a new interpreter, so
+# nothing is warm:
+#
+#   python bench_startup.py --runs 10
+#   python bench_startup.py --database-uri sqlite:// --target-ms 1500
+#
+# Also lists which of the heavy, lazily imported modules got loaded along
+# the way; none of them should be needed to serve the home page.
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+LAZY_MODULES = ('babel', 'wtforms', 'flask_wtf', 'pyarrow', 'redis')
+
+PROBE = '''
+import json, sys, time
+started = time.perf_counter()
+import config
+if {uri!r}:
+    config.SQLALCHEMY_DATABASE_URI = {uri!r}
+import app
+imported = time.perf_counter()
+application = app.create_app(config)
+created = time.perf_counter()
+status = application.test_client().get('/').status_code
+served = time.perf_counter()
+print(json.dumps({{
+    'import': (imported - started) * 1000,
+    'create_app': (created - imported) * 1000,
+    'first_request': (served - created) * 1000,
+    'total': (served - started) * 1000,
+    'status': status,
+    'loaded': [name for name in {lazy!r} if name in sys.modules],
+}}))
+'''
+
+
+def probe(database_uri):
+    code = PROBE.format(uri=database_uri, lazy=LAZY_MODULES)
+    output = subprocess.run(
+        [sys.executable, '-c', code], cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time cold start and first request.')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--database-uri', default='',
+                        help='override SQLALCHEMY_DATABASE_URI from config.py')
+    parser.add_argument('--target-ms', type=float,
+                        help='exit non-zero if the median total exceeds this')
+    args = parser.parse_args()
+
+    results = [probe(args.database_uri) for _ in range(args.runs)]
+
+    for phase in ('import', 'create_app', 'first_request', 'total'):
+        timings = [result[phase] for result in results]
+        print('{:<14} median {:8.1f} ms   max {:8.1f} ms'.format(
+            phase, statistics.median(timings), max(timings)))
+    print('status         {}'.format(', '.join(sorted({str(result['status']) for result in results}))))
+    loaded = sorted({name for result in results for name in result['loaded']})
+    print('lazy modules   {}'.format(', '.join(loaded) if loaded else 'none loaded'))
+
+    if args.target_ms is not None and statistics.median(r['total'] for r in results) > args.target_ms:
+        print('over target of {} ms'.format(args.target_ms))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
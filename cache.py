@@ -0,0 +1,301 @@
+#----------------------------------------------------------------------------#
+# Response cache.
+#----------------------------------------------------------------------------#
+
+# Read pages are cached whole, keyed by path and query string, and tagged
+# with the entities they render ('venue:3', 'artist:7', 'shows', ...).
+# Committed writes invalidate just the tags they touch, so adding a show
+# drops its venue page, its artist page and the listings and nothing else.
+#
+# Templates can also cache fragments, so a page that missed still renders
+# mostly from stored pieces:
+#
+#   {% cache 'show-tile:{}'.format(show.id), 3600, 'show:{}'.format(show.id), 'venue:{}'.format(show.venue_id) %}
+#     ...
+#   {% endcache %}
+#
+# The arguments are the key, a TTL in seconds (none for CACHE_TTL) and
+# the tags whose writes drop the fragment.
+
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from urllib.parse import urlencode
+
+from flask import current_app, g, make_response, request, session
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+from changes import CommittedChanges
+
+
+#  Stores
+#  ----------------------------------------------------------------
+
+class MemoryStore:
+
+    # LRU with a per-entry TTL and a tag -> keys index for invalidation.
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.tags = {}
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            item = self.entries.get(key)
+            if item is None:
+                return None
+            expires, entry, _ = item
+            if expires < time.monotonic():
+                self.discard(key)
+                return None
+            self.entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry, tags, ttl=None):
+        with self.lock:
+            self.discard(key)
+            self.entries[key] = (time.monotonic() + (ttl or self.ttl), entry, tags)
+            for tag in tags:
+                self.tags.setdefault(tag, set()).add(key)
+            while len(self.entries) > self.max_entries:
+                self.discard(next(iter(self.entries)))
+
+    def invalidate(self, tags):
+        with self.lock:
+            for tag in tags:
+                for key in self.tags.pop(tag, ()):
+                    self.discard(key)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.tags.clear()
+
+    # Callers hold the lock.
+    def discard(self, key):
+        item = self.entries.pop(key, None)
+        if item is None:
+            return
+        for tag in item[2]:
+            keys = self.tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.tags[tag]
+
+
+class RedisStore:
+
+    # Works with any client speaking the Redis GET/SET/SADD/SMEMBERS/
+    # DELETE/INCR commands. clear() bumps a generation number that is
+    # part of every key instead of scanning the keyspace.
+    def __init__(self, client, ttl, prefix='fyyur:cache:'):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def generation(self):
+        return int(self.client.get(self.prefix + 'generation') or 0)
+
+    def entry_key(self, key):
+        return '{}{}:{}'.format(self.prefix, self.generation(), key)
+
+    def tag_key(self, tag):
+        return '{}tag:{}'.format(self.prefix, tag)
+
+    def get(self, key):
+        data = self.client.get(self.entry_key(key))
+        return pickle.loads(data) if data is not None else None
+
+    def set(self, key, entry, tags, ttl=None):
+        ttl = ttl or self.ttl
+        entry_key = self.entry_key(key)
+        self.client.set(entry_key, pickle.dumps(entry), ex=ttl)
+        for tag in tags:
+            self.client.sadd(self.tag_key(tag), entry_key)
+            # A tag lives as long as its longest-lived entry.
+            if self.client.ttl(self.tag_key(tag)) < ttl:
+                self.client.expire(self.tag_key(tag), ttl)
+
+    def invalidate(self, tags):
+        for tag in tags:
+            keys = list(self.client.smembers(self.tag_key(tag)))
+            self.client.delete(self.tag_key(tag), *keys)
+
+    def clear(self):
+        self.client.incr(self.prefix + 'generation')
+
+
+def create_store(config, max_entries=None, prefix='fyyur:cache:'):
+    ttl = config.get('CACHE_TTL', 300)
+    if config.get('CACHE_BACKEND', 'memory') == 'redis':
+        import redis
+        return RedisStore(redis.Redis.from_url(config['CACHE_REDIS_URL']), ttl, prefix)
+    return MemoryStore(max_entries or config.get('CACHE_MAX_ENTRIES', 1024), ttl)
+
+
+#  Tagged caches
+#  ----------------------------------------------------------------
+
+class TaggedCache(CommittedChanges):
+
+    # Entries carry tags; a committed write to a registered model drops the
+    # entries tagged with what tags_for(obj) names. Subclasses create
+    # self.store in init_app().
+    def __init__(self, app=None):
+        self.models = {}
+        self.store = None
+        # Bumped on every invalidation; whatever was rendered while a write
+        # committed is not stored, since it may predate that write.
+        self.generation = 0
+        if app is not None:
+            self.init_app(app)
+
+    def register(self, model, tags_for):
+        self.models[model] = tags_for
+
+    def invalidate(self, *tags):
+        self.generation += 1
+        self.store.invalidate(tags)
+
+    def clear(self):
+        self.generation += 1
+        self.store.clear()
+
+    def snapshot(self, obj):
+        return self.models[type(obj)](obj)
+
+    def deleted_snapshot(self, obj):
+        return self.models[type(obj)](obj)
+
+    def update(self, model, doc_id, tags):
+        self.invalidate(*tags)
+
+    def reset(self, model):
+        self.clear()
+
+
+#  Cache
+#  ----------------------------------------------------------------
+
+class ResponseCache(TaggedCache):
+
+    def init_app(self, app):
+        self.enabled = app.config.get('CACHE_ENABLED', True)
+        self.store = create_store(app.config)
+        app.extensions['response_cache'] = self
+        self.listen()
+
+    # Called while rendering to tag the current response.
+    def tag(self, *tags):
+        g.setdefault('cache_tags', set()).update(tags)
+
+    # Called while rendering to keep the current response out of the cache.
+    def skip(self):
+        g.cache_skip = True
+
+    def cached(self, *tags):
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                # Pages carrying flashed messages are per-user; skip them.
+                # So are pages for a client that just wrote: it reads from
+                # the primary (see replicas.py), and a stored page may have
+                # come from a replica that hadn't seen the write yet.
+                replicas = current_app.extensions.get('replicas')
+                if (not self.enabled or request.method != 'GET' or '_flashes' in session
+                        or (replicas is not None and replicas.pinned())):
+                    return view(*args, **kwargs)
+
+                key = '{}?{}'.format(request.path, urlencode(sorted(request.args.items(multi=True))))
+                entry = self.store.get(key)
+                if entry is not None:
+                    body, status, headers = entry
+                    response = current_app.response_class(body, status, headers)
+                    response.headers['X-Cache'] = 'HIT'
+                    # Cached pages keep their ETag/Last-Modified, so a
+                    # revalidating client can still get a 304 here.
+                    return response.make_conditional(request)
+
+                generation = self.generation
+                g.cache_tags = set(tags)
+                response = make_response(view(*args, **kwargs))
+
+                if (response.status_code == 200 and not response.direct_passthrough
+                        and 'Set-Cookie' not in response.headers
+                        and not g.get('cache_skip')
+                        and generation == self.generation):
+                    headers = [(k, v) for k, v in response.headers.items() if k != 'Content-Length']
+                    self.store.set(key, (response.get_data(), response.status_code, headers), g.cache_tags)
+                response.headers['X-Cache'] = 'MISS'
+                return response
+            return wrapper
+        return decorator
+
+    # Compressed copies of cached pages (see compress.py) share the store.
+    # Their keys include a digest of the page, so they need no tags.
+    def encoded(self, key, encode):
+        data = self.store.get(key)
+        if data is None:
+            data = encode()
+            self.store.set(key, data, ())
+        return data
+
+
+#  Fragments
+#  ----------------------------------------------------------------
+
+class FragmentCacheExtension(Extension):
+
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=None)
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            args.append(parser.parse_expression())
+        body = parser.parse_statements(['name:endcache'], drop_needle=True)
+        return nodes.CallBlock(
+            self.call_method('render_fragment', [nodes.List(args)]), [], [], body
+        ).set_lineno(lineno)
+
+    def render_fragment(self, args, caller):
+        key, ttl, *tags = args + [None] * (2 - len(args))
+        cache = self.environment.fragment_cache
+        if cache is None or not cache.enabled:
+            return caller()
+        return cache.fragment(str(key), ttl, tags, caller)
+
+
+class FragmentCache(TaggedCache):
+
+    def init_app(self, app):
+        self.enabled = app.config.get('FRAGMENT_CACHE_ENABLED', app.config.get('CACHE_ENABLED', True))
+        self.store = create_store(app.config, app.config.get('FRAGMENT_CACHE_MAX_ENTRIES', 10000),
+                                  prefix='fyyur:fragments:')
+        # Before any template is compiled, like every Jinja extension.
+        app.jinja_env.add_extension(FragmentCacheExtension)
+        app.jinja_env.fragment_cache = self
+        self.listen()
+
+    def fragment(self, key, ttl, tags, render):
+        markup = self.store.get(key)
+        if markup is not None:
+            return Markup(markup)
+        generation = self.generation
+        markup = render()
+        # As with pages, a fragment rendered while a write committed may
+        # predate it and is not stored.
+        if generation == self.generation:
+            self.store.set(key, str(markup), [key] + list(tags), ttl)
+        return markup
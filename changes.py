@@ -0,0 +1,91 @@
+#----------------------------------------------------------------------------#
+# Committed changes.
+#----------------------------------------------------------------------------#
+
+# In-process structures (search index, suggestions, response cache) that
+# mirror database rows follow writes through these session hooks.
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+
+class CommittedChanges:
+
+    listeners = []
+
+    # Collects flushed changes to the watched models and hands them over
+    # only once the transaction commits, so a rolled back write never
+    # reaches an in-process index or cache. Subclasses provide snapshot(),
+    # which captures what they need from an object at flush time, plus
+    # update() and reset(). Deleted objects are passed through
+    # deleted_snapshot(), which by default keeps nothing.
+    #
+    # Objects built for one app (the search and suggestion indexes) pass
+    # it here and only follow that app's sessions; the caches, shared by
+    # every app, follow all of them.
+    def listen(self, app=None):
+        # Extensions call this from init_app(); one set of hooks per object
+        # however many apps it is initialised for.
+        if self in CommittedChanges.listeners:
+            return
+        self.app = app
+        self.pending_key = 'pending_changes_{}'.format(id(self))
+        CommittedChanges.listeners.append(self)
+        event.listen(Session, 'after_flush', self.collect_changes)
+        event.listen(Session, 'do_orm_execute', self.collect_bulk_changes)
+        event.listen(Session, 'after_commit', self.apply_changes)
+        event.listen(Session, 'after_rollback', self.discard_changes)
+
+    def watches(self):
+        if self.app is None:
+            return True
+        return has_app_context() and current_app._get_current_object() is self.app
+
+    def collect_changes(self, session, flush_context):
+        if not self.watches():
+            return
+        pending = session.info.setdefault(self.pending_key, [])
+        for obj in session.new | session.dirty:
+            if type(obj) in self.models:
+                pending.append((type(obj), obj.id, self.snapshot(obj)))
+        for obj in session.deleted:
+            if type(obj) in self.models:
+                pending.append((type(obj), obj.id, self.deleted_snapshot(obj)))
+
+    def deleted_snapshot(self, obj):
+        return None
+
+    # Bulk INSERT/UPDATE/DELETE statements don't say which rows they
+    # touched, so everything held for the model is reset.
+    def collect_bulk_changes(self, orm_execute_state):
+        if not self.watches():
+            return
+        if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+            mapper = orm_execute_state.bind_mapper
+            if mapper is not None and mapper.class_ in self.models:
+                pending = orm_execute_state.session.info.setdefault(self.pending_key, [])
+                pending.append((mapper.class_, None, None))
+
+    # Core DELETEs on a table are invisible to the hooks above; code issuing
+    # them reports what it removed here, as stand-in objects carrying the
+    # id and whatever attributes the snapshots read.
+    @classmethod
+    def record_deleted(cls, session, objects):
+        for listener in cls.listeners:
+            if not listener.watches():
+                continue
+            pending = session.info.setdefault(listener.pending_key, [])
+            for obj in objects:
+                if type(obj) in listener.models:
+                    pending.append((type(obj), obj.id, listener.deleted_snapshot(obj)))
+
+    def apply_changes(self, session):
+        for model, doc_id, snapshot in session.info.pop(self.pending_key, []):
+            if doc_id is None:
+                self.reset(model)
+            else:
+                self.update(model, doc_id, snapshot)
+
+    def discard_changes(self, session):
+        session.info.pop(self.pending_key, None)
@@ -0,0 +1,117 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import time
+import click
+from flask import Blueprint, current_app
+from flask.cli import AppGroup
+from models import db, Venue, Artist, refresh_show_counters, seed_sentinels
+from importer import IMPORT_KINDS, import_target, run_import, format_for, READERS, BATCH_SIZE
+from exporter import export_snapshot, WRITERS, COMPRESSIONS, CHUNK_SIZE
+from warmup import compile_templates, prerender
+from extensions import assets
+
+# A blueprint only to carry the commands; cli_group=None puts them at the
+# top level (`flask seed`, `flask shows rollover`, ...).
+bp = Blueprint('commands', __name__, cli_group=None)
+
+
+#----------------------------------------------------------------------------#
+# Commands.
+#----------------------------------------------------------------------------#
+
+shows_cli = AppGroup('shows', help='Maintain the stored show counters.')
+
+@shows_cli.command('rollover')
+def rollover_shows():
+  # Run periodically (e.g. every minute from cron): moves shows that have
+  # started from the upcoming to the past counters. Only rows whose
+  # next_show_at has passed are touched.
+  venues = refresh_show_counters(Venue, stale_only=True)
+  artists = refresh_show_counters(Artist, stale_only=True)
+  db.session.commit()
+  click.echo('Rolled over {} venues and {} artists.'.format(venues, artists))
+
+@shows_cli.command('reconcile')
+def reconcile_shows():
+  # Recomputes every counter from the shows table to repair drift.
+  venues = refresh_show_counters(Venue)
+  artists = refresh_show_counters(Artist)
+  db.session.commit()
+  click.echo('Reconciled {} venues and {} artists.'.format(venues, artists))
+
+bp.cli.add_command(shows_cli)
+
+templates_cli = AppGroup('templates', help='Precompile and warm the Jinja templates.')
+
+@templates_cli.command('warm')
+@click.option('--render', is_flag=True, help='Also render the main pages once.')
+def warm_templates(render):
+  # Run at build/deploy time: compiles every template into the bytecode
+  # cache (TEMPLATE_BYTECODE_CACHE_DIR), so no worker compiles on first use.
+  started = time.perf_counter()
+  names = compile_templates(current_app)
+  click.echo('Compiled {} templates in {:.0f} ms.'.format(len(names), (time.perf_counter() - started) * 1000))
+  if not current_app.jinja_env.bytecode_cache:
+    click.echo('TEMPLATE_BYTECODE_CACHE_DIR is not set; nothing was stored.')
+  if render:
+    for path, status, ms in prerender(current_app):
+      click.echo('{} {} {:.0f} ms'.format(path, status, ms))
+
+bp.cli.add_command(templates_cli)
+
+assets_cli = AppGroup('assets', help='Build the static asset bundles.')
+
+@assets_cli.command('build')
+@click.option('--no-minify', is_flag=True, help='Concatenate the sources as they are.')
+@click.option('--no-compress', is_flag=True, help='Skip the .gz/.br variants.')
+def build_assets(no_minify, no_compress):
+  # Run at build/deploy time; writes static/dist/ and its manifest.json.
+  manifest = assets.build(current_app.static_folder, not no_minify, not no_compress)
+  for name, filename in manifest.items():
+    click.echo('{} -> {}'.format(name, filename))
+
+bp.cli.add_command(assets_cli)
+
+@bp.cli.command('seed')
+def seed_data():
+  # Creates the TBD/REMOVED placeholder venues and artists if missing.
+  seed_sentinels()
+  click.echo('Sentinel venues and artists are in place.')
+
+@bp.cli.command('import')
+@click.argument('kind', type=click.Choice(IMPORT_KINDS))
+@click.argument('source', type=click.File('r', encoding='utf-8'))
+@click.option('--format', 'format', type=click.Choice(sorted(READERS)),
+              help='Input format; guessed from the file name by default.')
+@click.option('--batch-size', default=BATCH_SIZE, show_default=True)
+def import_data(kind, source, format, batch_size):
+  # Loads venues, artists or shows from a CSV/NDJSON file ('-' for stdin).
+  format = format or format_for(source.name)
+  report = run_import(db.session, import_target(kind), source, format, max(1, batch_size))
+
+  for error in report.errors:
+    messages = '; '.join('{}: {}'.format(field, ' '.join(errors)) for field, errors in error['errors'].items())
+    click.echo('line {}: {}'.format(error['line'], messages), err=True)
+  click.echo('Imported {} {}, rejected {}.'.format(report.inserted, kind, report.rejected))
+
+@bp.cli.command('export')
+@click.argument('dest', type=click.Path(file_okay=False))
+@click.option('--resource', 'resources', multiple=True, type=click.Choice(['venues', 'artists', 'shows']),
+              help='Resource to export (repeatable); all of them by default.')
+@click.option('--format', 'format', type=click.Choice(sorted(WRITERS)), default='csv', show_default=True)
+@click.option('--compression', type=click.Choice(sorted(COMPRESSIONS)), default='gzip', show_default=True)
+@click.option('--incremental', is_flag=True,
+              help='Only rows updated since the last snapshot in DEST.')
+@click.option('--chunk-size', default=CHUNK_SIZE, show_default=True)
+def export_data(dest, resources, format, compression, incremental, chunk_size):
+  # Nightly catalog snapshot into DEST; see exporter.py.
+  try:
+    snapshots = export_snapshot(db.session, dest, resources or ['venues', 'artists', 'shows'],
+                                format, compression, incremental, max(1, chunk_size))
+  except ImportError:
+    raise click.ClickException('The {} format needs pyarrow installed.'.format(format))
+
+  for name, snapshot in snapshots.items():
+    click.echo('Exported {} {} to {}.'.format(snapshot['rows'], name, snapshot['file']))
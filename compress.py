@@ -0,0 +1,201 @@
+#----------------------------------------------------------------------------#
+# Response compression.
+#----------------------------------------------------------------------------#
+
+# Compresses responses for clients that accept it: brotli when the brotli
+# package is installed and the client prefers it, gzip otherwise. Only
+# text-like types (COMPRESS_MIMETYPES) of at least COMPRESS_MIN_SIZE bytes
+# are compressed; below that the headers cost more than they save.
+#
+# Streamed responses (the API's NDJSON export) are compressed as they are
+# sent, with a sync flush every COMPRESS_STREAM_FLUSH_SIZE input bytes so
+# the client keeps receiving rows instead of waiting for the end.
+#
+# Pages served through the response cache are compressed once per encoding.
+# The compressed copy is kept in the cache's store, keyed by a digest of
+# the page, so later hits reuse it and a changed page never matches it.
+#
+# Responses that already carry a Content-Encoding (the precompressed
+# static bundles) or are sent straight from a file are left alone.
+
+import gzip
+import hashlib
+import threading
+import zlib
+
+from flask import current_app, request
+
+MIMETYPES = (
+    'text/html', 'text/css', 'text/plain', 'text/csv', 'text/javascript', 'text/xml',
+    'application/javascript', 'application/json', 'application/x-ndjson', 'application/xml',
+    'image/svg+xml',
+)
+
+
+#  Encoders
+#  ----------------------------------------------------------------
+
+class GzipStream:
+
+    def __init__(self, level):
+        # wbits 31: a deflate stream with the gzip header and trailer.
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def write(self, data):
+        return self.compressor.compress(data)
+
+    def flush(self):
+        return self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self.compressor.flush()
+
+
+class BrotliStream:
+
+    def __init__(self, brotli, quality):
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def write(self, data):
+        return self.compressor.process(data)
+
+    def flush(self):
+        return self.compressor.flush()
+
+    def finish(self):
+        return self.compressor.finish()
+
+
+def load_brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+#  Compress
+#  ----------------------------------------------------------------
+
+class Compress:
+
+    def __init__(self, app=None):
+        self.lock = threading.Lock()
+        # encoding -> [responses, bytes in, bytes out]
+        self.totals = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('COMPRESS_ENABLED', True)
+        self.min_size = app.config.get('COMPRESS_MIN_SIZE', 500)
+        self.level = app.config.get('COMPRESS_LEVEL', 6)
+        self.brotli_quality = app.config.get('COMPRESS_BROTLI_QUALITY', 5)
+        self.flush_size = app.config.get('COMPRESS_STREAM_FLUSH_SIZE', 16384)
+        self.mimetypes = set(app.config.get('COMPRESS_MIMETYPES') or MIMETYPES)
+        self.brotli = load_brotli() if app.config.get('COMPRESS_BROTLI', True) else None
+        self.encodings = ['br', 'gzip'] if self.brotli is not None else ['gzip']
+        # Registered after the other extensions, so it runs before their
+        # after_request hooks and request timings include compression.
+        app.after_request(self.compress_response)
+        app.extensions['compress'] = self
+
+    def compress_response(self, response):
+        if (not self.enabled or response.mimetype not in self.mimetypes
+                or response.direct_passthrough or 'Content-Encoding' in response.headers):
+            return response
+        # The body depends on Accept-Encoding whether or not this one is
+        # compressed, so shared caches must key on it either way.
+        response.vary.add('Accept-Encoding')
+        if response.status_code < 200 or response.status_code in (204, 206, 304):
+            return response
+        encoding = request.accept_encodings.best_match(self.encodings)
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            response.response = self.stream(response.response, encoding, response.charset)
+            response.headers.pop('Content-Length', None)
+        else:
+            body = response.get_data()
+            if len(body) < self.min_size:
+                return response
+            data = self.cached_encode(response, body, encoding)
+            response.set_data(data)
+            self.record(encoding, len(body), len(data))
+
+        response.headers['Content-Encoding'] = encoding
+        # Different bytes from the uncompressed page: a strong ETag would
+        # claim they are identical, a weak one still revalidates.
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+    def encode(self, body, encoding):
+        if encoding == 'br':
+            return self.brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, self.level, mtime=0)
+
+    def cached_encode(self, response, body, encoding):
+        cache = current_app.extensions.get('response_cache')
+        if cache is None or not cache.enabled or 'X-Cache' not in response.headers:
+            return self.encode(body, encoding)
+        key = 'encoded:{}:{}'.format(encoding, hashlib.sha1(body).hexdigest())
+        return cache.encoded(key, lambda: self.encode(body, encoding))
+
+    def open_stream(self, encoding):
+        if encoding == 'br':
+            return BrotliStream(self.brotli, self.brotli_quality)
+        return GzipStream(self.level)
+
+    def stream(self, chunks, encoding, charset):
+        compressor = self.open_stream(encoding)
+        size = compressed = pending = 0
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode(charset)
+                data = compressor.write(chunk)
+                size += len(chunk)
+                pending += len(chunk)
+                if pending >= self.flush_size:
+                    data += compressor.flush()
+                    pending = 0
+                if data:
+                    compressed += len(data)
+                    yield data
+            data = compressor.finish()
+            compressed += len(data)
+            yield data
+        finally:
+            # Closing the wrapper must still close the view's generator
+            # (and with it the request context stream_with_context holds).
+            if hasattr(chunks, 'close'):
+                chunks.close()
+        self.record(encoding, size, compressed)
+
+    #  Reporting
+    #  ----------------------------------------------------------------
+
+    def record(self, encoding, size, compressed):
+        with self.lock:
+            totals = self.totals.setdefault(encoding, [0, 0, 0])
+            totals[0] += 1
+            totals[1] += size
+            totals[2] += compressed
+
+    def families(self):
+        with self.lock:
+            totals = sorted((encoding, list(values)) for encoding, values in self.totals.items())
+        return [
+            ('fyyur_compressed_responses_total', 'counter', 'Responses compressed, by encoding.',
+             [('fyyur_compressed_responses_total', {'encoding': encoding}, values[0])
+              for encoding, values in totals]),
+            ('fyyur_compression_input_bytes_total', 'counter', 'Response bytes before compression.',
+             [('fyyur_compression_input_bytes_total', {'encoding': encoding}, values[1])
+              for encoding, values in totals]),
+            ('fyyur_compression_output_bytes_total', 'counter', 'Response bytes after compression.',
+             [('fyyur_compression_output_bytes_total', {'encoding': encoding}, values[2])
+              for encoding, values in totals]),
+        ]
@@ -0,0 +1,52 @@
+#----------------------------------------------------------------------------#
+# Date formatting.
+#----------------------------------------------------------------------------#
+
+# Backs the `datetime` template filter. babel.dates.format_datetime()
+# looks up the locale's patterns and re-parses them on every call; here
+# each (format, locale) pair is compiled to one Babel pattern once, and
+# formatted results are memoized, since a page of shows repeats the same
+# handful of start times. Strings are parsed with datetime.fromisoformat()
+# first and only fall back to dateutil for anything else.
+#
+# Babel and dateutil are imported on first use, not at worker startup.
+
+from datetime import datetime
+from functools import lru_cache
+
+NAMED_FORMATS = ('full', 'long', 'medium', 'short')
+
+
+@lru_cache(maxsize=64)
+def compiled_pattern(format, locale):
+    # Returns (pattern, babel Locale). A named format combines the
+    # locale's date and time patterns the way format_datetime() does.
+    from babel import Locale
+    from babel.dates import get_date_format, get_datetime_format, get_time_format, parse_pattern
+
+    locale = Locale.parse(locale)
+    if format in NAMED_FORMATS:
+        format = (get_datetime_format(format, locale)
+                  .replace('{0}', get_time_format(format, locale).pattern)
+                  .replace('{1}', get_date_format(format, locale).pattern))
+    return parse_pattern(format), locale
+
+
+def parse_datetime(value):
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        import dateutil.parser
+        return dateutil.parser.parse(value)
+
+
+@lru_cache(maxsize=4096)
+def format_cached(value, format, locale):
+    pattern, babel_locale = compiled_pattern(format, locale)
+    return pattern.apply(value, babel_locale)
+
+
+def format_datetime(value, format='medium', locale='en'):
+    return format_cached(parse_datetime(value), format, locale)
@@ -0,0 +1,246 @@
+#----------------------------------------------------------------------------#
+# Snapshot export.
+#----------------------------------------------------------------------------#
+
+# Writes the catalog out to files, one per resource of the JSON API:
+#
+#   flask export snapshots/                      (full, gzipped CSV)
+#   flask export snapshots/ --format ndjson --incremental
+#
+# Rows are read through a server-side cursor and written chunk by chunk,
+# so memory stays flat however large the tables get. DEST/manifest.json
+# keeps, per resource, the highest updated_at exported so far. Deletions
+# are not visible to an incremental run; take a full snapshot to catch up.
+#
+# updated_at is stamped when a row is written, not when its transaction
+# commits, so a row can turn up after a snapshot with a stamp older than
+# that snapshot's watermark. An incremental run therefore re-reads from
+# WATERMARK_MARGIN before the watermark and skips the rows the previous
+# run already wrote: the manifest lists the (id, updated_at) pairs inside
+# that margin.
+
+import bz2
+import csv
+import gzip
+import json
+import lzma
+import os
+from datetime import datetime, timedelta
+
+from api import RESOURCES, encode
+
+CHUNK_SIZE = 5000
+
+# Longer than any transaction writing venues, artists or shows.
+WATERMARK_MARGIN = timedelta(minutes=10)
+
+MANIFEST = 'manifest.json'
+
+COMPRESSIONS = {
+    'gzip': ('.gz', gzip.open),
+    'bz2': ('.bz2', bz2.open),
+    'xz': ('.xz', lzma.open),
+    'none': ('', open),
+}
+
+
+#  Writers
+#  ----------------------------------------------------------------
+
+class CsvWriter:
+
+    extension = '.csv'
+
+    def __init__(self, path, names, columns, compression):
+        self.file = COMPRESSIONS[compression][1](path, 'wt', encoding='utf-8', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(names)
+        self.names = names
+
+    @staticmethod
+    def cell(value):
+        if isinstance(value, list):
+            return ','.join(value)
+        return encode(value)
+
+    def write(self, items):
+        self.writer.writerows([self.cell(item[name]) for name in self.names] for item in items)
+
+    def close(self):
+        self.file.close()
+
+
+class NdjsonWriter:
+
+    extension = '.ndjson'
+
+    def __init__(self, path, names, columns, compression):
+        self.file = COMPRESSIONS[compression][1](path, 'wt', encoding='utf-8')
+
+    def write(self, items):
+        self.file.writelines(
+            json.dumps({name: encode(value) for name, value in item.items()}) + '\n'
+            for item in items
+        )
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+
+    # Columnar output through pyarrow, which is only needed (and only
+    # imported) for this format. Each chunk becomes one row group. Parquet
+    # compresses per column, so the file itself is never wrapped; 'none'
+    # turns column compression off and anything else uses zstd.
+    extension = '.parquet'
+
+    def __init__(self, path, names, columns, compression):
+        import pyarrow
+        import pyarrow.parquet
+        self.pyarrow = pyarrow
+        self.schema = pyarrow.schema([(name, self.arrow_type(columns.get(name))) for name in names])
+        self.writer = pyarrow.parquet.ParquetWriter(
+            path, self.schema, compression='none' if compression == 'none' else 'zstd')
+
+    def arrow_type(self, column):
+        pyarrow = self.pyarrow
+        if column is None:
+            return pyarrow.list_(pyarrow.string())
+        python_type = column.type.python_type
+        if python_type is bool:
+            return pyarrow.bool_()
+        if python_type is int:
+            return pyarrow.int64()
+        if python_type is datetime:
+            return pyarrow.timestamp('us')
+        return pyarrow.string()
+
+    def write(self, items):
+        self.writer.write_table(self.pyarrow.Table.from_pylist(items, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+WRITERS = {
+    'csv': CsvWriter,
+    'ndjson': NdjsonWriter,
+    'parquet': ParquetWriter,
+}
+
+
+#  Export
+#  ----------------------------------------------------------------
+
+def read_manifest(dest):
+    path = os.path.join(dest, MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as file:
+        return json.load(file)
+
+
+def write_manifest(dest, manifest):
+    path = os.path.join(dest, MANIFEST)
+    with open(path + '.tmp', 'w') as file:
+        json.dump(manifest, file, indent=2)
+    os.replace(path + '.tmp', path)
+
+
+def chunks(query, size):
+    # yield_per makes the driver use a server-side cursor.
+    chunk = []
+    for row in query.yield_per(size):
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def export_resource(session, dest, name, format, compression, since, chunk_size, stamp,
+                    exported=(), margin=WATERMARK_MARGIN):
+    resource = RESOURCES[name]
+    names = resource.field_names()
+    query = resource.query(session, names)
+    if since is not None:
+        query = query.filter(resource.model.updated_at >= datetime.fromisoformat(since) - margin)
+    exported = {(row_id, updated_at) for row_id, updated_at in exported}
+
+    writer_class = WRITERS[format]
+    filename = '{}-{}{}{}{}'.format(
+        name, stamp, '-incremental' if since is not None else '', writer_class.extension,
+        COMPRESSIONS[compression][0] if writer_class is not ParquetWriter else '')
+    path = os.path.join(dest, filename)
+
+    # Written under a temporary name and renamed when complete, so a
+    # reader never picks up a half-written snapshot.
+    writer = writer_class(path + '.tmp', names, resource.fields, compression)
+    rows = 0
+    watermark = None
+    # (id, updated_at) of the rows read within the margin of the watermark.
+    recent = {}
+    try:
+        for chunk in chunks(query, chunk_size):
+            items = list(resource.items(chunk, names))
+            latest = max(item['updated_at'] for item in items)
+            if watermark is None or latest > watermark:
+                watermark = latest
+                recent = {key: stamp for key, stamp in recent.items() if stamp >= watermark - margin}
+            for item in items:
+                if item['updated_at'] >= watermark - margin:
+                    recent[(item['id'], item['updated_at'].isoformat())] = item['updated_at']
+
+            items = [item for item in items if (item['id'], item['updated_at'].isoformat()) not in exported]
+            if items:
+                writer.write(items)
+                rows += len(items)
+    finally:
+        writer.close()
+    os.replace(path + '.tmp', path)
+
+    # Rows re-read from the margin alone must not move the watermark back.
+    if since is not None and (watermark is None or watermark < datetime.fromisoformat(since)):
+        watermark = datetime.fromisoformat(since)
+
+    return {
+        'file': filename,
+        'rows': rows,
+        'since': since,
+        'watermark': watermark.isoformat() if watermark is not None else None,
+        'exported': sorted([row_id, updated_at] for row_id, updated_at in recent),
+    }
+
+
+def export_snapshot(session, dest, names, format='csv', compression='gzip', incremental=False,
+                    chunk_size=CHUNK_SIZE):
+    os.makedirs(dest, exist_ok=True)
+    manifest = read_manifest(dest)
+    stamp = datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')
+
+    # On PostgreSQL every resource is read from the same MVCC snapshot, so
+    # shows never reference a venue the venues file doesn't have.
+    if session.get_bind().dialect.name == 'postgresql':
+        session.connection(execution_options={'isolation_level': 'REPEATABLE READ'})
+
+    snapshots = {}
+    try:
+        for name in names:
+            state = manifest.get(name, {})
+            since = state.get('watermark') if incremental else None
+            snapshot = export_resource(session, dest, name, format, compression, since, chunk_size, stamp,
+                                       state.get('exported', []) if incremental else ())
+            snapshot['created_at'] = stamp
+            manifest[name] = {
+                'watermark': snapshot['watermark'],
+                'exported': snapshot.pop('exported'),
+                'snapshots': state.get('snapshots', []) + [snapshot],
+            }
+            snapshots[name] = snapshot
+    finally:
+        session.rollback()
+
+    write_manifest(dest, manifest)
+    return snapshots
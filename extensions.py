@@ -0,0 +1,55 @@
+#----------------------------------------------------------------------------#
+# Extensions.
+#----------------------------------------------------------------------------#
+
+# Created unbound here and attached to an app by create_app(), so any
+# module can import them without importing the app.
+
+from flask_migrate import Migrate
+from flask_moment import Moment
+from models import Venue, Artist, Show
+from search import Search, Suggest
+from cache import ResponseCache, FragmentCache
+from pool import PoolMetrics
+from replicas import ReplicaRouter
+from metrics import Metrics
+from profiler import SqlProfiler
+from assets import Assets
+from compress import Compress
+
+moment = Moment()
+assets = Assets()
+migrate = Migrate()
+pool_metrics = PoolMetrics()
+replicas = ReplicaRouter()
+
+compress = Compress()
+
+metrics = Metrics()
+metrics.register_collector(pool_metrics.families)
+metrics.register_collector(compress.families)
+
+sql_profiler = SqlProfiler()
+
+search_backend = Search()
+search_backend.register(Venue)
+search_backend.register(Artist)
+
+suggest_index = Suggest()
+suggest_index.register(Venue, 'venue')
+suggest_index.register(Artist, 'artist')
+
+# 'venue:3' covers pages rendering venue 3's own fields, 'venue-shows:3'
+# pages listing its shows; likewise for artists.
+response_cache = ResponseCache()
+response_cache.register(Venue, lambda venue: ['venue:{}'.format(venue.id), 'venues', 'shows'])
+response_cache.register(Artist, lambda artist: ['artist:{}'.format(artist.id), 'artists', 'shows'])
+response_cache.register(Show, lambda show: [
+  'venue-shows:{}'.format(show.venue_id), 'artist-shows:{}'.format(show.artist_id), 'venues', 'shows'
+])
+
+# Show tiles are tagged with their show, venue and artist.
+fragment_cache = FragmentCache()
+fragment_cache.register(Venue, lambda venue: ['venue:{}'.format(venue.id)])
+fragment_cache.register(Artist, lambda artist: ['artist:{}'.format(artist.id)])
+fragment_cache.register(Show, lambda show: ['show:{}'.format(show.id)])
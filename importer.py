@@ -0,0 +1,370 @@
+#----------------------------------------------------------------------------#
+# Bulk import.
+#----------------------------------------------------------------------------#
+
+# Loads venues, artists and shows from CSV or NDJSON:
+#
+#   flask import venues venues.csv
+#   curl -F file=@shows.ndjson http://localhost:5000/import/shows
+#
+# Rows are read one at a time from the stream, checked against the same
+# rules as the create forms, and written in batches, each batch being one
+# multi-row INSERT and one commit. Rows that fail are reported by line
+# number and skipped; the rest of the file still loads.
+#
+# WTForms is only imported once rules are compiled, so importing this
+# module (e.g. for the CLI) stays cheap.
+
+import csv
+import json
+from datetime import datetime
+
+from sqlalchemy import insert, select
+
+from models import db, Venue, Artist, Show, genres_named, refresh_show_counters
+
+BATCH_SIZE = 1000
+
+# The report lists at most this many failed rows; the count covers all.
+MAX_REPORTED_ERRORS = 1000
+
+FORMATS = {
+    '.csv': 'csv',
+    '.ndjson': 'ndjson',
+    '.jsonl': 'ndjson',
+}
+
+
+#  Readers
+#  ----------------------------------------------------------------
+
+class MalformedRow:
+
+    def __init__(self, message):
+        self.message = message
+
+
+def read_csv(stream):
+    reader = csv.DictReader(stream)
+    for row in reader:
+        yield reader.line_num, row
+
+
+def read_ndjson(stream):
+    for line_no, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            yield line_no, json.loads(line)
+        except ValueError as error:
+            yield line_no, MalformedRow('Invalid JSON: {}'.format(error))
+
+
+READERS = {
+    'csv': read_csv,
+    'ndjson': read_ndjson,
+}
+
+
+def format_for(filename, default='csv'):
+    for extension, name in FORMATS.items():
+        if filename and filename.lower().endswith(extension):
+            return name
+    return default
+
+
+#  Validation
+#  ----------------------------------------------------------------
+
+class RowField:
+
+    # Just enough of a bound WTForms field for the form's own validator
+    # objects to run against one value.
+    def __init__(self, data):
+        self.data = data
+        self.errors = []
+
+    def gettext(self, string):
+        return string
+
+    def ngettext(self, singular, plural, n):
+        return singular if n == 1 else plural
+
+
+class FieldRule:
+
+    def __init__(self, name, unbound):
+        from wtforms import BooleanField, DateTimeField, SelectField, SelectMultipleField
+        from wtforms.validators import DataRequired
+
+        self.name = name
+        field_class = unbound.field_class
+        if issubclass(field_class, BooleanField):
+            self.kind = 'boolean'
+        elif issubclass(field_class, SelectMultipleField):
+            self.kind = 'multiple'
+        elif issubclass(field_class, SelectField):
+            self.kind = 'select'
+        elif issubclass(field_class, DateTimeField):
+            self.kind = 'datetime'
+        else:
+            self.kind = 'string'
+
+        validators = unbound.kwargs.get('validators') or []
+        # DataRequired runs first and stops the chain, as in WTForms.
+        self.validators = sorted(validators, key=lambda validator: not isinstance(validator, DataRequired))
+        choices = unbound.kwargs.get('choices')
+        self.choices = {choice[0] for choice in choices} if choices else None
+        self.format = unbound.kwargs.get('format', '%Y-%m-%d %H:%M:%S')
+
+    # Coerces a raw CSV/JSON value the way the field's process_formdata()
+    # would; raises ValueError with the form's message on bad input.
+    def coerce(self, value):
+        if self.kind == 'boolean':
+            if isinstance(value, bool):
+                return value
+            return value is not None and str(value).lower() not in ('false', '')
+        if self.kind == 'multiple':
+            if value is None:
+                return []
+            if isinstance(value, list):
+                return [str(item).strip() for item in value if str(item).strip()]
+            return [item.strip() for item in str(value).split(',') if item.strip()]
+        if value is None:
+            return None if self.kind == 'datetime' else ''
+        if self.kind == 'datetime':
+            if not str(value).strip():
+                return None
+            try:
+                return datetime.strptime(str(value).strip(), self.format)
+            except ValueError:
+                raise ValueError('Not a valid datetime value.')
+        return str(value)
+
+    def check_choices(self, data):
+        if self.choices is None:
+            return
+        if self.kind == 'multiple':
+            for value in data:
+                if value not in self.choices:
+                    raise ValueError("'{}' is not a valid choice for this field.".format(value))
+        elif self.kind == 'select' and data not in self.choices:
+            raise ValueError('Not a valid choice.')
+
+    def validate(self, value):
+        data = self.coerce(value)
+        if self.validators:
+            field = RowField(data)
+            for validator in self.validators:
+                validator(None, field)
+        self.check_choices(data)
+        return data
+
+
+class RowRules:
+
+    # Compiled once per form class from its unbound field definitions, so
+    # checking a row costs a few function calls rather than building and
+    # binding a whole form.
+    def __init__(self, form_class):
+        from wtforms.validators import StopValidation
+
+        # ValidationError is a ValueError; StopValidation (DataRequired) isn't.
+        self.failures = (ValueError, StopValidation)
+        self.fields = [
+            FieldRule(name, unbound)
+            for name, unbound in vars(form_class).items()
+            if hasattr(unbound, 'field_class')
+        ]
+
+    # Returns (data, errors); errors maps field names to messages.
+    def validate(self, row):
+        if isinstance(row, MalformedRow):
+            return None, {'row': [row.message]}
+        if not isinstance(row, dict):
+            return None, {'row': ['Expected an object.']}
+
+        data = {}
+        errors = {}
+        for rule in self.fields:
+            try:
+                data[rule.name] = rule.validate(row.get(rule.name))
+            except self.failures as error:
+                errors[rule.name] = [str(error)]
+        return data, errors
+
+
+#  Import
+#  ----------------------------------------------------------------
+
+class ImportTarget:
+
+    # load(batch) writes a batch of (line, data) pairs in the current
+    # transaction and returns {line: errors} for rows it refused, e.g.
+    # shows naming a venue that does not exist.
+    def __init__(self, form_class, load):
+        self.rules = RowRules(form_class)
+        self.load = load
+
+
+class ImportReport:
+
+    def __init__(self):
+        self.inserted = 0
+        self.rejected = 0
+        self.errors = []
+
+    def reject(self, line, errors):
+        self.rejected += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'errors': errors})
+
+    def to_dict(self):
+        return {
+            'inserted': self.inserted,
+            'rejected': self.rejected,
+            'errors': self.errors,
+        }
+
+
+def run_import(session, target, stream, format='csv', batch_size=BATCH_SIZE):
+    report = ImportReport()
+    batch = []
+    for line, row in READERS[format](stream):
+        data, errors = target.rules.validate(row)
+        if errors:
+            report.reject(line, errors)
+            continue
+        batch.append((line, data))
+        if len(batch) >= batch_size:
+            load_batch(session, target, batch, report)
+            batch = []
+    if batch:
+        load_batch(session, target, batch, report)
+    return report
+
+
+def load_batch(session, target, batch, report):
+    try:
+        refused = target.load(batch)
+        session.commit()
+    except Exception:
+        session.rollback()
+        # Something in the batch broke a database constraint; retry the
+        # rows one by one to find and report the offending ones.
+        if len(batch) > 1:
+            for item in batch:
+                load_batch(session, target, [item], report)
+            return
+        report.reject(batch[0][0], {'row': ['Could not be saved.']})
+        return
+
+    for line, errors in sorted(refused.items()):
+        report.reject(line, errors)
+    report.inserted += len(batch) - len(refused)
+
+
+#  Venues, artists and shows
+#  ----------------------------------------------------------------
+
+
+def load_with_genres(batch, build):
+    # One genre lookup for the whole batch; the entities then go out in a
+    # single multi-row INSERT on flush, followed by the genre links.
+    names = sorted({name for _, data in batch for name in data['genres']})
+    genres = {genre.name: genre for genre in genres_named(names)}
+
+    db.session.add_all([
+        build(data, [genres[name] for name in data['genres']])
+        for _, data in batch
+    ])
+    db.session.flush()
+    return {}
+
+
+def load_venues(batch):
+    return load_with_genres(batch, lambda data, genres: Venue(
+        name=data['name'],
+        city=data['city'],
+        state=data['state'],
+        address=data['address'],
+        phone=data['phone'],
+        genres=genres,
+        image_link=data['image_link'],
+        facebook_link=data['facebook_link'],
+        website_link=data['website_link'],
+        seeking=data['seeking_talent'],
+        seeking_comment=data['seeking_description']
+    ))
+
+
+def load_artists(batch):
+    return load_with_genres(batch, lambda data, genres: Artist(
+        name=data['name'],
+        city=data['city'],
+        state=data['state'],
+        phone=data['phone'],
+        genres=genres,
+        image_link=data['image_link'],
+        facebook_link=data['facebook_link'],
+        website_link=data['website_link'],
+        seeking=data['seeking_venue'],
+        seeking_comment=data['seeking_description']
+    ))
+
+
+def load_shows(batch):
+    # Shows are written with one executemany INSERT. The venue and artist
+    # ids are checked up front with one query each, so a bad reference
+    # costs its row rather than the whole batch.
+    refused = {}
+    rows = []
+    for line, data in batch:
+        try:
+            rows.append((line, {
+                'venue_id':   int(data['venue_id']),
+                'artist_id':  int(data['artist_id']),
+                'date':       data['start_time'],
+            }))
+        except ValueError:
+            refused[line] = {'row': ['venue_id and artist_id must be numbers.']}
+
+    venue_ids = set(db.session.scalars(
+        select(Venue.id).where(Venue.id.in_({row['venue_id'] for _, row in rows}))))
+    artist_ids = set(db.session.scalars(
+        select(Artist.id).where(Artist.id.in_({row['artist_id'] for _, row in rows}))))
+
+    valid = []
+    for line, row in rows:
+        errors = {}
+        if row['venue_id'] not in venue_ids:
+            errors['venue_id'] = ['No venue with id {}.'.format(row['venue_id'])]
+        if row['artist_id'] not in artist_ids:
+            errors['artist_id'] = ['No artist with id {}.'.format(row['artist_id'])]
+        if errors:
+            refused[line] = errors
+        else:
+            valid.append(row)
+
+    if valid:
+        db.session.execute(insert(Show), valid)
+        refresh_show_counters(Venue, {row['venue_id'] for row in valid})
+        refresh_show_counters(Artist, {row['artist_id'] for row in valid})
+    return refused
+
+
+IMPORT_KINDS = ('venues', 'artists', 'shows')
+import_targets = {}
+
+
+def import_target(kind):
+    # Built on first use: compiling the row rules imports the forms, and
+    # with them WTForms, which most workers never need.
+    if not import_targets:
+        from forms import VenueForm, ArtistForm, ShowForm
+        import_targets.update({
+            'venues':   ImportTarget(VenueForm, load_venues),
+            'artists':  ImportTarget(ArtistForm, load_artists),
+            'shows':    ImportTarget(ShowForm, load_shows),
+        })
+    return import_targets[kind]
@@ -0,0 +1,125 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import io
+import sys
+from flask import Blueprint, Response, render_template, request, current_app, url_for, jsonify, abort
+from models import db, Venue, Artist, remove_entities, remove_shows
+from extensions import suggest_index, pool_metrics, metrics
+from importer import IMPORT_KINDS, import_target, run_import, format_for, READERS, BATCH_SIZE
+
+bp = Blueprint('main', __name__)
+
+
+#----------------------------------------------------------------------------#
+# Controllers.
+#----------------------------------------------------------------------------#
+
+@bp.route('/')
+def index():
+  return render_template('pages/home.html')
+
+
+#  Batch Delete
+#  ----------------------------------------------------------------
+
+@bp.route('/batch/delete', methods=['POST'])
+def batch_delete():
+  # JSON body {"venues": [ids], "artists": [ids], "shows": [ids]}; all of
+  # it is removed in one transaction, or none of it.
+  payload = request.get_json(silent=True) or {}
+
+  try:
+    ids = {name: [int(id) for id in payload.get(name, [])] for name in ('venues', 'artists', 'shows')}
+  except (TypeError, ValueError):
+    return jsonify({ 'success': False, 'error': 'Ids must be lists of numbers.' }), 400
+
+  error = False
+
+  try:
+    deleted = {
+      'shows':    remove_shows(ids['shows']),
+      'venues':   remove_entities(Venue, ids['venues']),
+      'artists':  remove_entities(Artist, ids['artists']),
+    }
+    db.session.commit()
+  except:
+    db.session.rollback()
+    error = True
+    print(sys.exc_info())
+  finally:
+    db.session.close()
+  if error:
+    return jsonify({ 'success': False })
+  else:
+    return jsonify({ 'success': True, 'deleted': deleted })
+
+
+#  Search Suggestions
+#  ----------------------------------------------------------------
+
+@bp.route('/api/search/suggest')
+def search_suggest():
+
+  search_term = request.args.get('q', '')
+  kind = request.args.get('type')
+  limit = min(request.args.get('limit', 10, type=int), current_app.config['MAX_PAGE_SIZE'])
+
+  suggestions = suggest_index.suggest(search_term, max(1, limit), kind)
+
+  for suggestion in suggestions:
+    kind = suggestion['type']
+    suggestion['url'] = url_for('{0}s.show_{0}'.format(kind), **{kind + '_id': suggestion['id']})
+
+  return jsonify({ 'suggestions': suggestions })
+
+
+#  Metrics
+#  ----------------------------------------------------------------
+
+@bp.route('/metrics')
+def prometheus_metrics():
+  # Prometheus text format; see metrics.py for what is exported.
+  return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@bp.route('/metrics/pool')
+def pool_stats():
+  # This worker's connection pool: connections in use, idle and in
+  # overflow, plus how long checkouts have waited for one.
+  return jsonify(pool_metrics.snapshot())
+
+
+#  Bulk Import
+#  ----------------------------------------------------------------
+
+@bp.route('/import/<kind>', methods=['POST'])
+def import_upload(kind):
+  # multipart upload with a 'file' field; answers with the import report.
+  if kind not in IMPORT_KINDS:
+    abort(404)
+
+  upload = request.files.get('file')
+  if upload is None:
+    return jsonify({ 'error': 'No file uploaded.' }), 400
+
+  format = request.form.get('format') or format_for(upload.filename)
+  if format not in READERS:
+    return jsonify({ 'error': 'Unknown format {}.'.format(format) }), 400
+
+  stream = io.TextIOWrapper(upload.stream, encoding='utf-8', newline='')
+  batch_size = request.form.get('batch_size', BATCH_SIZE, type=int)
+  report = run_import(db.session, import_target(kind), stream, format, max(1, batch_size))
+
+  return jsonify(report.to_dict())
+
+
+#  Error Handlers
+#  ----------------------------------------------------------------
+@bp.app_errorhandler(404)
+def not_found_error(error):
+    return render_template('errors/404.html'), 404
+
+@bp.app_errorhandler(500)
+def server_error(error):
+    return render_template('errors/500.html'), 500
@@ -0,0 +1,228 @@
+#----------------------------------------------------------------------------#
+# Metrics.
+#----------------------------------------------------------------------------#
+
+# Request, SQL, template and cache metrics in the Prometheus text format,
+# served at GET /metrics:
+#
+#   fyyur_request_duration_seconds{endpoint,method}   latency histogram
+#   fyyur_requests_total{endpoint,method,status}
+#   fyyur_request_sql_statements{endpoint}            statements per request
+#   fyyur_request_sql_seconds{endpoint}               SQL time per request
+#   fyyur_template_render_seconds{template}
+#   fyyur_response_cache_requests_total{endpoint,result}
+#   fyyur_response_cache_hit_ratio{endpoint}
+#
+# plus whatever registered collectors add (connection pool, compression).
+# Figures are per worker process; with several workers, scrape each one or
+# aggregate in Prometheus by instance.
+
+import threading
+import time
+
+from flask import g, has_request_context, request
+
+from statements import statement_timer
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+
+#  Metric types
+#  ----------------------------------------------------------------
+
+class Counter:
+
+    kind = 'counter'
+
+    def __init__(self, name, help, labels):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.values = {}
+
+    # Callers hold Metrics.lock.
+    def inc(self, label_values, amount=1):
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def samples(self):
+        for label_values, value in sorted(self.values.items()):
+            yield self.name, dict(zip(self.labels, label_values)), value
+
+
+class Histogram:
+
+    kind = 'histogram'
+
+    def __init__(self, name, help, labels, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        # label values -> [bucket counts..., sum, count]
+        self.values = {}
+
+    # Callers hold Metrics.lock.
+    def observe(self, label_values, value):
+        counts = self.values.get(label_values)
+        if counts is None:
+            counts = self.values[label_values] = [0] * len(self.buckets) + [0, 0]
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[index] += 1
+                break
+        counts[-2] += value
+        counts[-1] += 1
+
+    def samples(self):
+        for label_values, counts in sorted(self.values.items()):
+            labels = dict(zip(self.labels, label_values))
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                yield self.name + '_bucket', dict(labels, le=format_value(bound)), cumulative
+            yield self.name + '_bucket', dict(labels, le='+Inf'), counts[-1]
+            yield self.name + '_sum', labels, counts[-2]
+            yield self.name + '_count', labels, counts[-1]
+
+
+#  Exposition
+#  ----------------------------------------------------------------
+
+def format_value(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+# A family is (name, kind, help, samples), samples being
+# (sample name, labels, value) triples; collectors return a list of them.
+def render_family(name, kind, help, samples):
+    lines = ['# HELP {} {}'.format(name, help), '# TYPE {} {}'.format(name, kind)]
+    for sample_name, labels, value in samples:
+        if labels:
+            label_text = ','.join('{}="{}"'.format(key, escape(val)) for key, val in labels.items())
+            lines.append('{}{{{}}} {}'.format(sample_name, label_text, format_value(value)))
+        else:
+            lines.append('{} {}'.format(sample_name, format_value(value)))
+    return lines
+
+
+#  Metrics
+#  ----------------------------------------------------------------
+
+class Metrics:
+
+    def __init__(self, app=None):
+        self.lock = threading.Lock()
+        self.collectors = []
+        self.request_seconds = Histogram(
+            'fyyur_request_duration_seconds', 'Request latency by endpoint.', ('endpoint', 'method'))
+        self.requests = Counter(
+            'fyyur_requests_total', 'Requests by endpoint and status.', ('endpoint', 'method', 'status'))
+        self.sql_statements = Histogram(
+            'fyyur_request_sql_statements', 'SQL statements executed per request.', ('endpoint',),
+            STATEMENT_BUCKETS)
+        self.sql_seconds = Histogram(
+            'fyyur_request_sql_seconds', 'Time spent in SQL per request.', ('endpoint',))
+        self.template_seconds = Histogram(
+            'fyyur_template_render_seconds', 'Template render time.', ('template',))
+        self.cache_requests = Counter(
+            'fyyur_response_cache_requests_total', 'Response cache lookups by result.', ('endpoint', 'result'))
+        self.metrics = [self.request_seconds, self.requests, self.sql_statements, self.sql_seconds,
+                        self.template_seconds, self.cache_requests]
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.before_request(self.start_request)
+        app.after_request(self.end_request)
+        # Set before any template is loaded; compiled templates are
+        # instances of the environment's template_class.
+        app.jinja_env.template_class = self.template_class(app.jinja_env.template_class)
+        statement_timer.subscribe(self.record_statement)
+        app.extensions['metrics'] = self
+
+    # collector() returns a list of families, see render_family().
+    def register_collector(self, collector):
+        self.collectors.append(collector)
+
+    #  Requests
+    #  ----------------------------------------------------------------
+
+    def start_request(self):
+        g.metrics_started = time.perf_counter()
+        g.sql_statements = 0
+        g.sql_seconds = 0.0
+
+    def end_request(self, response):
+        started = g.get('metrics_started')
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        # Unmatched URLs share one label so 404 probes can't grow the series.
+        endpoint = request.endpoint or 'unmatched'
+        with self.lock:
+            self.request_seconds.observe((endpoint, request.method), elapsed)
+            self.requests.inc((endpoint, request.method, str(response.status_code)))
+            self.sql_statements.observe((endpoint,), g.sql_statements)
+            self.sql_seconds.observe((endpoint,), g.sql_seconds)
+            result = response.headers.get('X-Cache')
+            if result in ('HIT', 'MISS'):
+                self.cache_requests.inc((endpoint, result.lower()))
+        return response
+
+    #  SQL
+    #  ----------------------------------------------------------------
+
+    def record_statement(self, statement, seconds):
+        if has_request_context() and 'sql_statements' in g:
+            g.sql_statements += 1
+            g.sql_seconds += seconds
+
+    #  Templates
+    #  ----------------------------------------------------------------
+
+    def template_class(self, base):
+        metrics = self
+
+        class TimedTemplate(base):
+
+            # Only the top-level render is timed; extended and included
+            # templates count towards the template that pulled them in.
+            def render(self, *args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return super().render(*args, **kwargs)
+                finally:
+                    with metrics.lock:
+                        metrics.template_seconds.observe((self.name or '<string>',), time.perf_counter() - started)
+
+        return TimedTemplate
+
+    #  Exposition
+    #  ----------------------------------------------------------------
+
+    def cache_hit_ratio(self):
+        totals = {}
+        for (endpoint, result), count in self.cache_requests.values.items():
+            hits, lookups = totals.get(endpoint, (0, 0))
+            totals[endpoint] = (hits + (count if result == 'hit' else 0), lookups + count)
+        samples = [('fyyur_response_cache_hit_ratio', {'endpoint': endpoint}, hits / lookups)
+                   for endpoint, (hits, lookups) in sorted(totals.items())]
+        return ('fyyur_response_cache_hit_ratio', 'gauge', 'Share of response cache lookups that hit.', samples)
+
+    def render(self):
+        lines = []
+        with self.lock:
+            for metric in self.metrics:
+                lines += render_family(metric.name, metric.kind, metric.help, list(metric.samples()))
+            lines += render_family(*self.cache_hit_ratio())
+        for collector in self.collectors:
+            for family in collector():
+                lines += render_family(*family)
+        return '\n'.join(lines) + '\n'
@@ -93,10 +93,19 @@ def run_migrations_online():
     connectable = get_engine()
 
     with connectable.connect() as connection:
+
+        # Indexes the models limit to one dialect with ddl_if() (the
+        # PostgreSQL search indexes) are only compared on that dialect, so
+        # autogenerate on SQLite doesn't try to add them.
+        def include_object(object, name, type_, reflected, compare_to):
+            ddl_if = getattr(object, '_ddl_if', None) if type_ == 'index' else None
+            return ddl_if is None or ddl_if.dialect in (None, connection.dialect.name)
+
         context.configure(
             connection=connection,
             target_metadata=get_metadata(),
             process_revision_directives=process_revision_directives,
+            include_object=include_object,
             **current_app.extensions['migrate'].configure_args
         )
 
@@ -0,0 +1,65 @@
+"""add full-text search vectors to venues and artists
+
+Revision ID: 5d2b8e61a4c7
+Revises: c4e1a7d2f903
+Create Date: 2026-10-18 11:03:17.284650
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '5d2b8e61a4c7'
+down_revision = 'c4e1a7d2f903'
+branch_labels = None
+depends_on = None
+
+
+# Name weighs most, then genres, then location.
+SEARCH_VECTOR = """
+    setweight(to_tsvector('simple', coalesce({row}name, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce({row}genres, '')), 'B') ||
+    setweight(to_tsvector('simple', coalesce({row}city, '') || ' ' || coalesce({row}state, '')), 'C')
+"""
+
+
+def upgrade():
+    is_postgres = op.get_bind().dialect.name == 'postgresql'
+
+    for table in ('venues', 'artists'):
+        if not is_postgres:
+            op.add_column(table, sa.Column('search_vector', sa.Text(), nullable=True))
+            continue
+
+        op.add_column(table, sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+        op.execute("""
+            CREATE FUNCTION {table}_search_vector_update() RETURNS trigger AS $$
+            BEGIN
+              NEW.search_vector := {vector};
+              RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql
+        """.format(table=table, vector=SEARCH_VECTOR.format(row='NEW.')))
+        op.execute("""
+            CREATE TRIGGER {table}_search_vector_trigger
+            BEFORE INSERT OR UPDATE OF name, city, state, genres ON {table}
+            FOR EACH ROW EXECUTE FUNCTION {table}_search_vector_update()
+        """.format(table=table))
+        op.execute('UPDATE {table} SET search_vector = {vector}'.format(
+            table=table, vector=SEARCH_VECTOR.format(row='')))
+        op.create_index('ix_{}_search_vector'.format(table), table, ['search_vector'],
+                        unique=False, postgresql_using='gin')
+
+
+def downgrade():
+    is_postgres = op.get_bind().dialect.name == 'postgresql'
+
+    for table in ('artists', 'venues'):
+        if is_postgres:
+            op.drop_index('ix_{}_search_vector'.format(table), table_name=table)
+            op.execute('DROP TRIGGER {table}_search_vector_trigger ON {table}'.format(table=table))
+            op.execute('DROP FUNCTION {table}_search_vector_update()'.format(table=table))
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('search_vector')
@@ -0,0 +1,29 @@
+"""index venues in listing order
+
+Revision ID: 7c3e5a9d1f24
+Revises: d3f8a1c6b470
+Create Date: 2026-10-18 19:42:07.583102
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '7c3e5a9d1f24'
+down_revision = 'd3f8a1c6b470'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # /venues pages through (state, city, name, id); the index serves that
+    # order and the ?state=&city= filters, replacing the (city, state) one.
+    with op.batch_alter_table('venues', schema=None) as batch_op:
+        batch_op.create_index('ix_venues_state_city_name_id', ['state', 'city', 'name', 'id'], unique=False)
+        batch_op.drop_index('ix_venues_city_state')
+
+
+def downgrade():
+    with op.batch_alter_table('venues', schema=None) as batch_op:
+        batch_op.create_index('ix_venues_city_state', ['city', 'state'], unique=False)
+        batch_op.drop_index('ix_venues_state_city_name_id')
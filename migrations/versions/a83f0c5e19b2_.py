@@ -0,0 +1,152 @@
+"""move venue and artist genres into a genres table
+
+Revision ID: a83f0c5e19b2
+Revises: 5d2b8e61a4c7
+Create Date: 2026-10-18 12:26:05.917342
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a83f0c5e19b2'
+down_revision = '5d2b8e61a4c7'
+branch_labels = None
+depends_on = None
+
+
+# (entity table, association table, foreign key column)
+ENTITIES = (
+    ('venues', 'venue_genres', 'venue_id'),
+    ('artists', 'artist_genres', 'artist_id'),
+)
+
+SEARCH_VECTOR = """
+    setweight(to_tsvector('simple', coalesce(NEW.name, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce({genres}, '')), 'B') ||
+    setweight(to_tsvector('simple', coalesce(NEW.city, '') || ' ' || coalesce(NEW.state, '')), 'C')
+"""
+
+GENRE_NAMES = """(
+    SELECT string_agg(g.name, ' ')
+    FROM {link} l JOIN genres g ON g.id = l.genre_id
+    WHERE l.{fk} = NEW.id
+)"""
+
+
+def replace_search_trigger(table, genres, columns):
+    op.execute('DROP TRIGGER {table}_search_vector_trigger ON {table}'.format(table=table))
+    op.execute("""
+        CREATE OR REPLACE FUNCTION {table}_search_vector_update() RETURNS trigger AS $$
+        BEGIN
+          NEW.search_vector := {vector};
+          RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """.format(table=table, vector=SEARCH_VECTOR.format(genres=genres)))
+    op.execute("""
+        CREATE TRIGGER {table}_search_vector_trigger
+        BEFORE INSERT OR UPDATE OF {columns} ON {table}
+        FOR EACH ROW EXECUTE FUNCTION {table}_search_vector_update()
+    """.format(table=table, columns=columns))
+
+
+def upgrade():
+    conn = op.get_bind()
+    is_postgres = conn.dialect.name == 'postgresql'
+
+    genres = op.create_table('genres',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=120), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+
+    for table, link, fk in ENTITIES:
+        op.create_table(link,
+        sa.Column(fk, sa.Integer(), nullable=False),
+        sa.Column('genre_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint([fk], [table + '.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['genre_id'], ['genres.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint(fk, 'genre_id')
+        )
+        op.create_index('ix_{}_genre_id_{}'.format(link, fk), link, ['genre_id', fk], unique=False)
+
+    # Data migration: split the comma-joined strings into genre rows and
+    # links. The sentinel rows stored 'N/A', which is not a genre.
+    genre_ids = {}
+    for table, link, fk in ENTITIES:
+        links = []
+        rows = conn.execute(sa.text('SELECT id, genres FROM {}'.format(table)))
+        for entity_id, joined in rows:
+            names = {name.strip() for name in (joined or '').split(',')}
+            for name in sorted(names - {'', 'N/A'}):
+                if name not in genre_ids:
+                    genre_ids[name] = conn.execute(
+                        genres.insert().values(name=name).returning(genres.c.id)
+                    ).scalar()
+                links.append({fk: entity_id, 'genre_id': genre_ids[name]})
+        if links:
+            link_table = sa.table(link, sa.column(fk), sa.column('genre_id'))
+            op.bulk_insert(link_table, links)
+
+    for table, link, fk in ENTITIES:
+        if is_postgres:
+            replace_search_trigger(table, GENRE_NAMES.format(link=link, fk=fk), 'name, city, state')
+            # Genres are linked after the row is written, so changes to the
+            # association table refresh the owning row's search vector.
+            op.execute("""
+                CREATE FUNCTION {link}_touch() RETURNS trigger AS $$
+                BEGIN
+                  UPDATE {table} SET name = name WHERE id = COALESCE(NEW.{fk}, OLD.{fk});
+                  RETURN NULL;
+                END
+                $$ LANGUAGE plpgsql
+            """.format(link=link, table=table, fk=fk))
+            op.execute("""
+                CREATE TRIGGER {link}_touch
+                AFTER INSERT OR DELETE ON {link}
+                FOR EACH ROW EXECUTE FUNCTION {link}_touch()
+            """.format(link=link))
+            op.execute('UPDATE {table} SET name = name'.format(table=table))
+
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('genres')
+
+
+def downgrade():
+    conn = op.get_bind()
+    is_postgres = conn.dialect.name == 'postgresql'
+
+    for table, link, fk in ENTITIES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('genres', sa.String(length=120), nullable=True))
+
+        rows = conn.execute(sa.text("""
+            SELECT l.{fk}, g.name FROM {link} l JOIN genres g ON g.id = l.genre_id
+            ORDER BY l.{fk}, g.name
+        """.format(link=link, fk=fk)))
+        joined = {}
+        for entity_id, name in rows:
+            joined.setdefault(entity_id, []).append(name)
+        for entity_id, names in joined.items():
+            conn.execute(
+                sa.text('UPDATE {} SET genres = :genres WHERE id = :id'.format(table)),
+                {'genres': ', '.join(names), 'id': entity_id}
+            )
+        conn.execute(sa.text("UPDATE {} SET genres = 'N/A' WHERE genres IS NULL".format(table)))
+
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.alter_column('genres', existing_type=sa.String(length=120), nullable=False)
+
+        if is_postgres:
+            op.execute('DROP TRIGGER {link}_touch ON {link}'.format(link=link))
+            op.execute('DROP FUNCTION {link}_touch()'.format(link=link))
+            replace_search_trigger(table, 'NEW.genres', 'name, city, state, genres')
+            op.execute('UPDATE {table} SET name = name'.format(table=table))
+
+        op.drop_index('ix_{}_genre_id_{}'.format(link, fk), table_name=link)
+        op.drop_table(link)
+
+    op.drop_table('genres')
@@ -0,0 +1,44 @@
+"""add stable sentinel keys to venues and artists
+
+Revision ID: b61d4f7a2e93
+Revises: f2a96d3c8b15
+Create Date: 2026-10-18 16:12:47.503218
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b61d4f7a2e93'
+down_revision = 'f2a96d3c8b15'
+branch_labels = None
+depends_on = None
+
+
+SENTINELS = {
+    'venues': {'tbd': 'TBD', 'removed': '[VENUE REMOVED]'},
+    'artists': {'tbd': 'TBD', 'removed': '[ARTIST REMOVED]'},
+}
+
+
+def upgrade():
+    for table, keys in SENTINELS.items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('sentinel', sa.String(length=20), nullable=True))
+            batch_op.create_unique_constraint('uq_{}_sentinel'.format(table), ['sentinel'])
+
+        # Earlier app starts could seed the placeholders more than once;
+        # the oldest copy, the one shows have been pointing at, gets the key.
+        for key, name in keys.items():
+            op.execute(sa.text(
+                "UPDATE {0} SET sentinel = :key WHERE id = "
+                "(SELECT min(id) FROM {0} WHERE name = :name AND city = 'N/A')".format(table)
+            ).bindparams(key=key, name=name))
+
+
+def downgrade():
+    for table in SENTINELS:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_constraint('uq_{}_sentinel'.format(table), type_='unique')
+            batch_op.drop_column('sentinel')
@@ -0,0 +1,50 @@
+"""add indexes for listing, detail and search queries
+
+Revision ID: c4e1a7d2f903
+Revises: 012efd05dc96
+Create Date: 2026-10-18 10:12:41.503118
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4e1a7d2f903'
+down_revision = '012efd05dc96'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('shows', schema=None) as batch_op:
+        batch_op.create_index('ix_shows_venue_id_date', ['venue_id', 'date'], unique=False)
+        batch_op.create_index('ix_shows_artist_id_date', ['artist_id', 'date'], unique=False)
+        batch_op.create_index('ix_shows_date_id', ['date', 'id'], unique=False)
+
+    with op.batch_alter_table('venues', schema=None) as batch_op:
+        batch_op.create_index('ix_venues_city_state', ['city', 'state'], unique=False)
+
+    # Trigram indexes let the name ILIKE '%term%' searches use an index
+    # instead of scanning every row.
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.create_index('ix_venues_name_trgm', 'venues', ['name'], unique=False,
+                        postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+        op.create_index('ix_artists_name_trgm', 'artists', ['name'], unique=False,
+                        postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+    else:
+        op.create_index('ix_venues_name_trgm', 'venues', ['name'], unique=False)
+        op.create_index('ix_artists_name_trgm', 'artists', ['name'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_artists_name_trgm', table_name='artists')
+    op.drop_index('ix_venues_name_trgm', table_name='venues')
+
+    with op.batch_alter_table('venues', schema=None) as batch_op:
+        batch_op.drop_index('ix_venues_city_state')
+
+    with op.batch_alter_table('shows', schema=None) as batch_op:
+        batch_op.drop_index('ix_shows_date_id')
+        batch_op.drop_index('ix_shows_artist_id_date')
+        batch_op.drop_index('ix_shows_venue_id_date')
@@ -0,0 +1,42 @@
+"""seed the TBD/REMOVED sentinel venues and artists
+
+Revision ID: d3f8a1c6b470
+Revises: b61d4f7a2e93
+Create Date: 2026-10-18 17:05:31.228640
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3f8a1c6b470'
+down_revision = 'b61d4f7a2e93'
+branch_labels = None
+depends_on = None
+
+
+# (table, sentinel key, name); the same rows as SENTINELS in models.py.
+SENTINELS = (
+    ('venues', 'tbd', 'TBD'),
+    ('venues', 'removed', '[VENUE REMOVED]'),
+    ('artists', 'tbd', 'TBD'),
+    ('artists', 'removed', '[ARTIST REMOVED]'),
+)
+
+
+def upgrade():
+    for table, key, name in SENTINELS:
+        columns = "sentinel, name, city, state, phone, image_link, facebook_link, website_link, seeking, seeking_comment"
+        values = ":key, :name, 'N/A', 'N/A', 'N/A', 'N/A', 'N/A', 'N/A', false, 'N/A'"
+        if table == 'venues':
+            columns += ", address"
+            values += ", 'N/A'"
+        op.execute(sa.text(
+            "INSERT INTO {} ({}) VALUES ({}) ON CONFLICT (sentinel) DO NOTHING".format(table, columns, values)
+        ).bindparams(key=key, name=name))
+
+
+def downgrade():
+    # The rows may be referenced by shows by now; leave them in place.
+    pass
@@ -0,0 +1,48 @@
+"""add stored show counters to venues and artists
+
+Revision ID: e17c94b0d6a8
+Revises: a83f0c5e19b2
+Create Date: 2026-10-18 13:41:52.630871
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e17c94b0d6a8'
+down_revision = 'a83f0c5e19b2'
+branch_labels = None
+depends_on = None
+
+
+# (entity table, foreign key column on shows)
+ENTITIES = (
+    ('venues', 'venue_id'),
+    ('artists', 'artist_id'),
+)
+
+
+def upgrade():
+    for table, fk in ENTITIES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('upcoming_show_count', sa.Integer(), server_default='0', nullable=False))
+            batch_op.add_column(sa.Column('past_show_count', sa.Integer(), server_default='0', nullable=False))
+            batch_op.add_column(sa.Column('next_show_at', sa.DateTime(), nullable=True))
+            batch_op.create_index('ix_{}_next_show_at'.format(table), ['next_show_at'], unique=False)
+
+        op.execute("""
+            UPDATE {table} SET
+              upcoming_show_count = (SELECT count(*) FROM shows WHERE shows.{fk} = {table}.id AND shows.date > CURRENT_TIMESTAMP),
+              past_show_count = (SELECT count(*) FROM shows WHERE shows.{fk} = {table}.id AND shows.date <= CURRENT_TIMESTAMP),
+              next_show_at = (SELECT min(shows.date) FROM shows WHERE shows.{fk} = {table}.id AND shows.date > CURRENT_TIMESTAMP)
+        """.format(table=table, fk=fk))
+
+
+def downgrade():
+    for table, fk in ENTITIES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_index('ix_{}_next_show_at'.format(table))
+            batch_op.drop_column('next_show_at')
+            batch_op.drop_column('past_show_count')
+            batch_op.drop_column('upcoming_show_count')
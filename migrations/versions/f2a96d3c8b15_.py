@@ -0,0 +1,34 @@
+"""add updated_at to venues, artists and shows
+
+Revision ID: f2a96d3c8b15
+Revises: e17c94b0d6a8
+Create Date: 2026-10-18 14:58:20.114973
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2a96d3c8b15'
+down_revision = 'e17c94b0d6a8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # UTC, as the ORM writes it: now() on PostgreSQL is in the server's
+    # time zone, CURRENT_TIMESTAMP on SQLite is already UTC.
+    if op.get_bind().dialect.name == 'postgresql':
+        utc_now = sa.text("timezone('utc', now())")
+    else:
+        utc_now = sa.func.now()
+    for table in ('venues', 'artists', 'shows'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('updated_at', sa.DateTime(), server_default=utc_now, nullable=False))
+
+
+def downgrade():
+    for table in ('shows', 'artists', 'venues'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('updated_at')
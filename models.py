@@ -0,0 +1,321 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+from datetime import datetime
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import func, select, update, delete
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import deferred
+from sqlalchemy.sql.expression import FunctionElement
+from changes import CommittedChanges
+from replicas import RoutingSession
+
+db = SQLAlchemy(session_options={'class_': RoutingSession})
+
+
+# Database-side default for updated_at: the current time in UTC, like the
+# datetime.utcnow() the ORM stamps. PostgreSQL's now() is in the server's
+# time zone; SQLite's CURRENT_TIMESTAMP is already UTC.
+class utc_now(FunctionElement):
+    type = db.DateTime()
+    inherit_cache = True
+
+@compiles(utc_now)
+def compile_utc_now(element, compiler, **kw):
+    return 'CURRENT_TIMESTAMP'
+
+@compiles(utc_now, 'postgresql')
+def compile_utc_now_postgresql(element, compiler, **kw):
+    return "timezone('utc', now())"
+
+
+#----------------------------------------------------------------------------#
+# Models.
+#----------------------------------------------------------------------------#
+
+class Genre(db.Model):
+    __tablename__ = 'genres'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(120), nullable=False, unique=True)
+
+    # Send log info for debugging
+    def __repr__(self):
+      return f'<Genre {self.id} {self.name}>'
+
+# The (genre_id, entity_id) indexes serve "all venues/artists in this
+# genre" lookups; the primary keys already cover the other direction.
+venue_genres = db.Table('venue_genres',
+    db.Column('venue_id', db.Integer, db.ForeignKey('venues.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('genre_id', db.Integer, db.ForeignKey('genres.id', ondelete='CASCADE'), primary_key=True),
+    db.Index('ix_venue_genres_genre_id_venue_id', 'genre_id', 'venue_id'),
+)
+
+artist_genres = db.Table('artist_genres',
+    db.Column('artist_id', db.Integer, db.ForeignKey('artists.id', ondelete='CASCADE'), primary_key=True),
+    db.Column('genre_id', db.Integer, db.ForeignKey('genres.id', ondelete='CASCADE'), primary_key=True),
+    db.Index('ix_artist_genres_genre_id_artist_id', 'genre_id', 'artist_id'),
+)
+
+class Venue(db.Model):
+    __tablename__ = 'venues'
+    __table_args__ = (
+        db.Index('ix_venues_state_city_name_id', 'state', 'city', 'name', 'id'),
+        db.Index('ix_venues_name_trgm', 'name',
+                 postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}),
+        # PostgreSQL only, as in the migration: elsewhere search_vector is
+        # never filled and search uses the in-process index.
+        db.Index('ix_venues_search_vector', 'search_vector', postgresql_using='gin').ddl_if(dialect='postgresql'),
+        db.Index('ix_venues_next_show_at', 'next_show_at'),
+        db.UniqueConstraint('sentinel', name='uq_venues_sentinel'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(), nullable=False)
+    city = db.Column(db.String(120), nullable=False)
+    state = db.Column(db.String(120), nullable=False)
+    address = db.Column(db.String(120), nullable=False)
+    phone = db.Column(db.String(120), nullable=False)
+    image_link = db.Column(db.String(500), nullable=False)
+    website_link = db.Column(db.String(240))
+    facebook_link = db.Column(db.String(240))
+    genres = db.relationship('Genre', secondary=venue_genres, lazy='selectin', order_by='Genre.name')
+    seeking = db.Column(db.Boolean, default=False)
+    seeking_comment = db.Column(db.String(500))
+    # Maintained by a database trigger (see migrations), never written here.
+    search_vector = deferred(db.Column(TSVECTOR().with_variant(db.Text(), 'sqlite')))
+    # Denormalized from shows by refresh_show_counters(); see below.
+    upcoming_show_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    past_show_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    next_show_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow,
+                           onupdate=datetime.utcnow, server_default=utc_now())
+    # 'tbd' / 'removed' on the placeholder rows shows point at; see below.
+    sentinel = db.Column(db.String(20))
+    shows = db.relationship('Show', backref='venue', lazy=True, order_by='Show.date')
+
+    # Send log info for debugging
+    def __repr__(self):
+      return f'<Venue {self.id} {self.name}>'
+
+class Artist(db.Model):
+    __tablename__ = 'artists'
+    __table_args__ = (
+        db.Index('ix_artists_name_trgm', 'name',
+                 postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}),
+        db.Index('ix_artists_search_vector', 'search_vector', postgresql_using='gin').ddl_if(dialect='postgresql'),
+        db.Index('ix_artists_next_show_at', 'next_show_at'),
+        db.UniqueConstraint('sentinel', name='uq_artists_sentinel'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(), nullable=False)
+    city = db.Column(db.String(120), nullable=False)
+    state = db.Column(db.String(120), nullable=False)
+    phone = db.Column(db.String(120), nullable=False)
+    image_link = db.Column(db.String(500), nullable=False)
+    website_link = db.Column(db.String(240))
+    facebook_link = db.Column(db.String(240))
+    genres = db.relationship('Genre', secondary=artist_genres, lazy='selectin', order_by='Genre.name')
+    seeking = db.Column(db.Boolean, default=False)
+    seeking_comment = db.Column(db.String(500))
+    # Maintained by a database trigger (see migrations), never written here.
+    search_vector = deferred(db.Column(TSVECTOR().with_variant(db.Text(), 'sqlite')))
+    # Denormalized from shows by refresh_show_counters(); see below.
+    upcoming_show_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    past_show_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    next_show_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow,
+                           onupdate=datetime.utcnow, server_default=utc_now())
+    # 'tbd' / 'removed' on the placeholder rows shows point at; see below.
+    sentinel = db.Column(db.String(20))
+    shows = db.relationship('Show', backref='artist', lazy=True, order_by='Show.date')
+
+    # Send log info for debugging
+    def __repr__(self):
+      return f'<Artist {self.id} {self.name}>'
+
+class Show(db.Model):
+    __tablename__ = 'shows'
+    __table_args__ = (
+        db.Index('ix_shows_venue_id_date', 'venue_id', 'date'),
+        db.Index('ix_shows_artist_id_date', 'artist_id', 'date'),
+        db.Index('ix_shows_date_id', 'date', 'id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    artist_id = db.Column(db.Integer, db.ForeignKey('artists.id'), nullable=False,
+                          default=lambda: sentinel_id(Artist, 'tbd'))
+    venue_id = db.Column(db.Integer, db.ForeignKey('venues.id'), nullable=False,
+                         default=lambda: sentinel_id(Venue, 'tbd'))
+    date = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow,
+                           onupdate=datetime.utcnow, server_default=utc_now())
+
+    # Send log info for debugging
+    def __repr__(self):
+      return f'<Show {self.id}>'
+
+
+def genres_named(names):
+  # Looks up the Genre rows for the submitted names, adding any that are new.
+  genres = Genre.query.filter(Genre.name.in_(names)).all()
+  known = {genre.name for genre in genres}
+
+  for name in names:
+    if name not in known:
+      genre = Genre(name=name)
+      db.session.add(genre)
+      genres.append(genre)
+      known.add(name)
+
+  return genres
+
+
+#  Show counters
+#  ----------------------------------------------------------------
+
+SHOW_COUNTER_KEYS = {
+  'venues': 'venue_id',
+  'artists': 'artist_id',
+}
+
+def refresh_show_counters(model, ids=None, stale_only=False):
+  # Recomputes upcoming_show_count, past_show_count and next_show_at from
+  # the shows table in one UPDATE, for the given ids, for rows whose next
+  # show has started (stale_only), or for every row. Callers run it in
+  # the same transaction as the show write it accounts for.
+  #
+  # The statement targets the Table rather than the mapped class so the
+  # in-process search/suggest indexes don't treat it as a bulk rename.
+  # updated_at is written back unchanged: the counters are derived from
+  # shows, so refreshing them must not change the row's ETag or send it
+  # out again in the next incremental export.
+  now = datetime.now()
+  table = model.__table__
+  shows = Show.__table__
+  owner = shows.c[SHOW_COUNTER_KEYS[table.name]] == table.c.id
+
+  statement = update(table).values(
+    upcoming_show_count = select(func.count(shows.c.id)).where(owner, shows.c.date > now).scalar_subquery(),
+    past_show_count =     select(func.count(shows.c.id)).where(owner, shows.c.date <= now).scalar_subquery(),
+    next_show_at =        select(func.min(shows.c.date)).where(owner, shows.c.date > now).scalar_subquery(),
+    updated_at =          table.c.updated_at
+  )
+
+  if ids is not None:
+    statement = statement.where(table.c.id.in_([int(id) for id in ids]))
+  if stale_only:
+    statement = statement.where(table.c.next_show_at <= now)
+
+  return db.session.execute(statement).rowcount
+
+
+#  Sentinel rows
+#  ----------------------------------------------------------------
+
+# Placeholder venues/artists that shows point at: 'tbd' for a show whose
+# venue/artist isn't known yet, 'removed' once it has been deleted. They
+# are created at deploy time, by `flask db upgrade` or `flask seed`, never
+# from a request.
+
+def sentinel_row(key, name, **fields):
+  return dict(
+    sentinel =          key,
+    name =              name,
+    city =              'N/A',
+    state =             'N/A',
+    phone =             'N/A',
+    image_link =        'N/A',
+    facebook_link =     'N/A',
+    website_link =      'N/A',
+    seeking =           False,
+    seeking_comment =   'N/A',
+    **fields
+  )
+
+SENTINELS = {
+  Venue: [
+    sentinel_row('tbd', 'TBD', address='N/A'),
+    sentinel_row('removed', '[VENUE REMOVED]', address='N/A'),
+  ],
+  Artist: [
+    sentinel_row('tbd', 'TBD'),
+    sentinel_row('removed', '[ARTIST REMOVED]'),
+  ],
+}
+
+def seed_sentinels():
+  # Idempotent: rows already present are skipped by ON CONFLICT on the
+  # unique sentinel key, so it is safe to run on every deploy and from
+  # several processes at once.
+  upsert = postgresql.insert if db.engine.dialect.name == 'postgresql' else sqlite.insert
+  for model, rows in SENTINELS.items():
+    db.session.execute(
+      upsert(model.__table__).values(rows).on_conflict_do_nothing(index_elements=['sentinel'])
+    )
+  db.session.commit()
+
+# Sentinel rows are never deleted or re-keyed, so their ids are looked up
+# once per process and kept.
+sentinel_ids = {}
+
+def sentinel_id(model, key):
+  if (model, key) not in sentinel_ids:
+    rows = db.session.execute(select(model.sentinel, model.id).where(model.sentinel.isnot(None)))
+    for sentinel, id in rows:
+      sentinel_ids[(model, sentinel)] = id
+    if (model, key) not in sentinel_ids:
+      raise LookupError('No {} sentinel {!r}; run `flask seed`.'.format(model.__tablename__, key))
+  return sentinel_ids[(model, key)]
+
+
+#  Removing venues, artists and shows
+#  ----------------------------------------------------------------
+
+def remove_entities(model, ids):
+  # Deletes venues or artists with set-based statements: their shows move
+  # to the '[... REMOVED]' sentinel in one UPDATE, the rows go in one
+  # DELETE, and the sentinel's counters are refreshed. Sentinel rows are
+  # never deleted. Runs in the caller's transaction; returns the count.
+  table = model.__table__
+  shows = Show.__table__
+  key = SHOW_COUNTER_KEYS[table.name]
+
+  ids = list(db.session.scalars(
+    select(table.c.id).where(table.c.id.in_([int(id) for id in ids]), table.c.sentinel.is_(None))
+  ))
+  if not ids:
+    return 0
+
+  removed = sentinel_id(model, 'removed')
+  db.session.execute(update(shows).where(shows.c[key].in_(ids)).values({key: removed}))
+  db.session.execute(delete(table).where(table.c.id.in_(ids)))
+  refresh_show_counters(model, [removed])
+
+  # Table-level statements skip the session hooks, so the search and
+  # suggestion indexes and the response cache are told directly.
+  CommittedChanges.record_deleted(db.session, [model(id=id) for id in ids])
+  return len(ids)
+
+def remove_shows(ids):
+  shows = Show.__table__
+
+  rows = db.session.execute(
+    select(shows.c.id, shows.c.venue_id, shows.c.artist_id)
+    .where(shows.c.id.in_([int(id) for id in ids]))
+  ).all()
+  if not rows:
+    return 0
+
+  db.session.execute(delete(shows).where(shows.c.id.in_([row.id for row in rows])))
+  refresh_show_counters(Venue, {row.venue_id for row in rows})
+  refresh_show_counters(Artist, {row.artist_id for row in rows})
+
+  CommittedChanges.record_deleted(db.session, [
+    Show(id=row.id, venue_id=row.venue_id, artist_id=row.artist_id) for row in rows
+  ])
+  return len(rows)
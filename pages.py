@@ -0,0 +1,140 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import base64
+import hashlib
+import json
+from datetime import datetime, timezone
+from flask import request, current_app, abort, make_response
+from sqlalchemy import func
+from models import db, Genre, Venue, Artist, Show
+
+
+#----------------------------------------------------------------------------#
+# Listing filters.
+#----------------------------------------------------------------------------#
+
+def listing_filters(query, model):
+  # Optional ?genre=, ?city= and ?state= filters for the listing pages;
+  # the genre filter is an EXISTS over the indexed association table.
+  genre = request.args.get('genre')
+  if genre:
+    query = query.filter(model.genres.any(Genre.name == genre))
+
+  city = request.args.get('city')
+  if city:
+    query = query.filter(model.city == city)
+
+  state = request.args.get('state')
+  if state:
+    query = query.filter(model.state == state)
+
+  return query
+
+
+#----------------------------------------------------------------------------#
+# Pagination.
+#----------------------------------------------------------------------------#
+
+# Listing pages use keyset (seek) pagination: each page starts strictly
+# after the last row of the previous one, so the cost of a page does not
+# grow with the size of the table the way OFFSET would.
+
+def page_size():
+  limit = request.args.get('limit', current_app.config['PAGE_SIZE'], type=int)
+  return max(1, min(limit, current_app.config['MAX_PAGE_SIZE']))
+
+def id_cursor():
+  return request.args.get('after', type=int)
+
+def show_cursor():
+  after = request.args.get('after')
+  if not after:
+    return None
+  try:
+    date, show_id = after.rsplit('_', 1)
+    return datetime.fromisoformat(date), int(show_id)
+  except ValueError:
+    abort(400)
+
+def encode_show_cursor(show):
+  return '{}_{}'.format(show.date.isoformat(), show.id)
+
+# /venues is ordered by (state, city, name, id), so its pages keep each
+# area's venues together; the cursor carries all four, as opaque
+# URL-safe base64 since names can contain anything.
+def venue_cursor():
+  after = request.args.get('after')
+  if not after:
+    return None
+  try:
+    state, city, name, venue_id = json.loads(base64.urlsafe_b64decode(after.encode()))
+    return state, city, name, int(venue_id)
+  except (ValueError, TypeError):
+    abort(400)
+
+def encode_venue_cursor(venue):
+  data = json.dumps([venue.state, venue.city, venue.name, venue.id])
+  return base64.urlsafe_b64encode(data.encode()).decode()
+
+def split_page(rows, limit):
+  # Pages are fetched with one extra row to find out whether there is a
+  # next page without running a separate COUNT.
+  return rows[:limit], len(rows) > limit
+
+
+#----------------------------------------------------------------------------#
+# Conditional requests.
+#----------------------------------------------------------------------------#
+
+# Detail pages get an ETag and Last-Modified from one aggregate query over
+# the entity, its shows and the artists/venues those shows link to, so a
+# revalidating client gets a 304 before the page's real queries run.
+
+def entity_version(model, entity_id):
+  if model is Venue:
+    show_fk, counterpart, counterpart_fk = Show.venue_id, Artist, Show.artist_id
+  else:
+    show_fk, counterpart, counterpart_fk = Show.artist_id, Venue, Show.venue_id
+
+  version = (
+    db.session.query(
+      model.updated_at,
+      func.count(Show.id),
+      func.count(Show.id).filter(Show.date > datetime.now()),
+      func.max(Show.updated_at),
+      func.max(counterpart.updated_at)
+    )
+    .outerjoin(Show, show_fk == model.id)
+    .outerjoin(counterpart, counterpart_fk == counterpart.id)
+    .filter(model.id == entity_id)
+    .group_by(model.id)
+    .first()
+  )
+  if version is None:
+    abort(404)
+
+  etag = hashlib.sha1(repr((model.__tablename__, entity_id) + tuple(version)).encode()).hexdigest()
+  timestamps = [stamp for stamp in (version[0], version[3], version[4]) if stamp is not None]
+  last_modified = max(timestamps).replace(tzinfo=timezone.utc, microsecond=0)
+
+  return etag, last_modified
+
+def is_not_modified(etag, last_modified):
+  # If-None-Match wins over If-Modified-Since when both are sent.
+  # Weak comparison, as If-None-Match calls for: compressed pages carry
+  # the weak form of the ETag.
+  if request.if_none_match:
+    return request.if_none_match.contains_weak(etag)
+  if request.if_modified_since:
+    return last_modified <= request.if_modified_since
+  return False
+
+def versioned_response(response, etag, last_modified):
+  response = make_response(response)
+  response.set_etag(etag)
+  response.last_modified = last_modified
+  # Let browsers and the CDN keep the page but revalidate before reuse.
+  response.cache_control.no_cache = True
+  return response
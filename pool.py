@@ -0,0 +1,213 @@
+#----------------------------------------------------------------------------#
+# Connection pool.
+#----------------------------------------------------------------------------#
+
+# Engine options come from config.py, which reads them from the
+# environment (DATABASE_POOL_SIZE, DATABASE_MAX_OVERFLOW, ...). Anything
+# set explicitly in SQLALCHEMY_ENGINE_OPTIONS wins.
+#
+# DATABASE_PGBOUNCER=1 is for running behind PgBouncer in transaction
+# mode: PgBouncer does the pooling, so the app opens a connection per
+# checkout (NullPool), never prepares statements, and applies the
+# statement timeout per transaction with SET LOCAL, since a session-level
+# SET would leak to whichever client gets the server connection next.
+#
+# The pool classes used here are instrumented: PoolMetrics records how
+# long each checkout waited, how many connections are in use and how far
+# the pool has overflowed, for /metrics and /metrics/pool.
+
+import threading
+import time
+import weakref
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool, QueuePool
+
+# Upper bounds, in seconds, of the checkout wait histogram.
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30)
+
+
+class InstrumentedPool:
+
+    # Mixed into a pool class by PoolMetrics.pool_class(); metrics is set
+    # on the generated subclass, so it survives Pool.recreate().
+    metrics = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics.pools.add(self)
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeout:
+            self.metrics.observe_timeout(time.perf_counter() - started)
+            raise
+        self.metrics.observe_wait(time.perf_counter() - started)
+        return connection
+
+
+class PoolMetrics:
+
+    def __init__(self, app=None):
+        self.lock = threading.Lock()
+        self.pools = weakref.WeakSet()
+        self.pool_classes = {}
+        self.checkouts = 0
+        self.timeouts = 0
+        self.in_use = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.wait_buckets = [0] * len(WAIT_BUCKETS)
+        self.statement_timeout = 0
+        if app is not None:
+            self.init_app(app)
+
+    # Called before db.init_app(), which creates the engine from
+    # SQLALCHEMY_ENGINE_OPTIONS.
+    def init_app(self, app):
+        options = engine_options(app.config, app.config['SQLALCHEMY_DATABASE_URI'], self)
+        options.update(app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+        app.extensions['pool_metrics'] = self
+
+        if app.config.get('DATABASE_PGBOUNCER') and app.config.get('DATABASE_STATEMENT_TIMEOUT'):
+            self.statement_timeout = int(app.config['DATABASE_STATEMENT_TIMEOUT'])
+            if not event.contains(Session, 'after_begin', self.set_statement_timeout):
+                event.listen(Session, 'after_begin', self.set_statement_timeout)
+
+    def pool_class(self, base):
+        if base not in self.pool_classes:
+            pool_class = type(base.__name__, (InstrumentedPool, base), {'metrics': self})
+            event.listen(pool_class, 'checkout', self.checked_out)
+            event.listen(pool_class, 'checkin', self.checked_in)
+            self.pool_classes[base] = pool_class
+        return self.pool_classes[base]
+
+    def set_statement_timeout(self, session, transaction, connection):
+        if connection.dialect.name == 'postgresql':
+            connection.exec_driver_sql('SET LOCAL statement_timeout = {:d}'.format(self.statement_timeout))
+
+    #  Recording
+    #  ----------------------------------------------------------------
+
+    def observe_wait(self, seconds):
+        with self.lock:
+            self.checkouts += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            for index, bound in enumerate(WAIT_BUCKETS):
+                if seconds <= bound:
+                    self.wait_buckets[index] += 1
+                    break
+
+    def observe_timeout(self, seconds):
+        with self.lock:
+            self.timeouts += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def checked_out(self, dbapi_connection, connection_record, connection_proxy):
+        with self.lock:
+            self.in_use += 1
+
+    def checked_in(self, dbapi_connection, connection_record):
+        with self.lock:
+            self.in_use -= 1
+
+    #  Reporting
+    #  ----------------------------------------------------------------
+
+    def snapshot(self):
+        size = idle = overflow = max_overflow = 0
+        for pool in list(self.pools):
+            if isinstance(pool, QueuePool):
+                size += pool.size()
+                idle += pool.checkedin()
+                # overflow() counts up from -pool_size.
+                overflow += max(0, pool.overflow())
+                max_overflow += pool._max_overflow
+        with self.lock:
+            cumulative = 0
+            buckets = []
+            for bound, count in zip(WAIT_BUCKETS, self.wait_buckets):
+                cumulative += count
+                buckets.append((bound, cumulative))
+            return {
+                'size': size,
+                'in_use': self.in_use,
+                'idle': idle,
+                'overflow': overflow,
+                'max_overflow': max_overflow,
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'wait_seconds_total': self.wait_total,
+                'wait_seconds_max': self.wait_max,
+                'wait_seconds_buckets': buckets,
+            }
+
+    # The same numbers as metric families for /metrics.
+    def families(self):
+        stats = self.snapshot()
+        waits = [('fyyur_db_pool_wait_seconds_bucket', {'le': str(bound)}, count)
+                 for bound, count in stats['wait_seconds_buckets']]
+        waits += [
+            ('fyyur_db_pool_wait_seconds_bucket', {'le': '+Inf'}, stats['checkouts'] + stats['timeouts']),
+            ('fyyur_db_pool_wait_seconds_sum', {}, stats['wait_seconds_total']),
+            ('fyyur_db_pool_wait_seconds_count', {}, stats['checkouts'] + stats['timeouts']),
+        ]
+        gauges = [
+            ('fyyur_db_pool_{}'.format(name), 'gauge', help, [('fyyur_db_pool_{}'.format(name), {}, stats[name])])
+            for name, help in (
+                ('size', 'Connections the pool keeps open.'),
+                ('in_use', 'Connections checked out.'),
+                ('idle', 'Connections open and checked in.'),
+                ('overflow', 'Connections open beyond the pool size.'),
+                ('max_overflow', 'Overflow connections allowed.'),
+            )
+        ]
+        return gauges + [
+            ('fyyur_db_pool_checkouts_total', 'counter', 'Connections checked out.',
+             [('fyyur_db_pool_checkouts_total', {}, stats['checkouts'])]),
+            ('fyyur_db_pool_timeouts_total', 'counter', 'Checkouts that gave up waiting.',
+             [('fyyur_db_pool_timeouts_total', {}, stats['timeouts'])]),
+            ('fyyur_db_pool_wait_seconds', 'histogram', 'Time spent waiting for a connection.', waits),
+        ]
+
+
+# Options for an engine on url. Engines created with metrics get its
+# instrumented pool classes; read replicas are created without.
+def engine_options(config, url, metrics=None):
+    url = make_url(url)
+    # In-memory SQLite gets a StaticPool from Flask-SQLAlchemy.
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        return {}
+
+    postgres = url.get_backend_name() == 'postgresql'
+    timeout = int(config.get('DATABASE_STATEMENT_TIMEOUT', 0))
+
+    if config.get('DATABASE_PGBOUNCER'):
+        options = {'poolclass': metrics.pool_class(NullPool) if metrics else NullPool}
+        # psycopg2 never prepares statements; psycopg 3 and asyncpg do
+        # unless told not to.
+        if url.get_driver_name() == 'psycopg':
+            options['connect_args'] = {'prepare_threshold': None}
+        elif url.get_driver_name() == 'asyncpg':
+            options['connect_args'] = {'statement_cache_size': 0}
+        return options
+
+    options = {
+        'poolclass': metrics.pool_class(QueuePool) if metrics else QueuePool,
+        'pool_size': int(config.get('DATABASE_POOL_SIZE', 5)),
+        'max_overflow': int(config.get('DATABASE_MAX_OVERFLOW', 10)),
+        'pool_timeout': int(config.get('DATABASE_POOL_TIMEOUT', 30)),
+        'pool_recycle': int(config.get('DATABASE_POOL_RECYCLE', -1)),
+        'pool_pre_ping': bool(config.get('DATABASE_POOL_PRE_PING', True)),
+    }
+    if postgres and timeout:
+        options['connect_args'] = {'options': '-c statement_timeout={:d}'.format(timeout)}
+    return options
@@ -0,0 +1,171 @@
+#----------------------------------------------------------------------------#
+# SQL profiler.
+#----------------------------------------------------------------------------#
+
+# Records every statement a request runs, groups statements that differ
+# only in their literals and IN-list lengths, and flags a group repeated
+# SQL_PROFILER_N_PLUS_ONE times or more as a likely N+1 (a lookup per row
+# instead of one query for all of them). On by default in debug mode
+# (SQL_PROFILER overrides). While on, each response carries
+#
+#   Server-Timing: db;dur=4.2;desc="7 SQL", app;dur=11.8, n1;desc="..."
+#
+# N+1 groups are logged as warnings, and GET /_profiler lists the last
+# SQL_PROFILER_HISTORY requests with their statement groups.
+#
+# sql_profiler.budget(n) fails a block whose requests run more than n
+# statements, e.g. from a test or a script against the test client:
+#
+#   with sql_profiler.budget(3):
+#       client.get('/venues/1')
+
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from flask import Response, g, has_request_context, request
+
+from statements import statement_timer
+
+LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+# Bound parameters in the styles the drivers use: ? (sqlite), %s and
+# %(name)s (psycopg2), :name, and $1 (asyncpg, which LITERALS has already
+# turned into $?). Expanded IN lists repeat them once per value.
+PLACEHOLDER = r'(?:\?|\$\?|%s|%\(\w+\)s|:\w+)'
+IN_LISTS = re.compile(r'\bIN\s*\(\s*{0}(?:\s*,\s*{0})*\s*\)'.format(PLACEHOLDER), re.IGNORECASE)
+WHITESPACE = re.compile(r'\s+')
+
+
+def normalize(statement):
+    statement = LITERALS.sub('?', statement)
+    statement = IN_LISTS.sub('IN (...)', statement)
+    return WHITESPACE.sub(' ', statement).strip()
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class RequestProfile:
+
+    def __init__(self, method, path):
+        self.method = method
+        self.path = path
+        self.status = None
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+        self.statements = []
+
+    def record(self, statement, seconds):
+        self.statements.append((normalize(statement), seconds))
+
+    @property
+    def sql_seconds(self):
+        return sum(seconds for _, seconds in self.statements)
+
+    # [(statement, count, seconds)], most repeated first.
+    def groups(self):
+        groups = {}
+        for statement, seconds in self.statements:
+            count, total = groups.get(statement, (0, 0.0))
+            groups[statement] = (count + 1, total + seconds)
+        return sorted(((statement, count, total) for statement, (count, total) in groups.items()),
+                      key=lambda group: (-group[1], -group[2]))
+
+    def n_plus_one(self, threshold):
+        return [group for group in self.groups() if group[1] >= threshold]
+
+    def summary(self, threshold):
+        lines = ['{} {} {}  {} statements, {:.1f} ms SQL, {:.1f} ms total'.format(
+            self.method, self.path, self.status, len(self.statements),
+            self.sql_seconds * 1000, self.elapsed * 1000)]
+        for statement, count, seconds in self.groups():
+            flag = 'N+1' if count >= threshold else '   '
+            lines.append('  {} {:>4}x {:8.1f} ms  {}'.format(flag, count, seconds * 1000, statement))
+        return '\n'.join(lines)
+
+
+class SqlProfiler:
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.threshold = 3
+        self.history = deque(maxlen=50)
+        self.watchers = []
+        self.lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('SQL_PROFILER', app.debug)
+        self.threshold = app.config.get('SQL_PROFILER_N_PLUS_ONE', 3)
+        self.history = deque(maxlen=app.config.get('SQL_PROFILER_HISTORY', 50))
+        self.logger = app.logger
+        app.before_request(self.start_request)
+        app.after_request(self.end_request)
+        if self.enabled:
+            app.add_url_rule('/_profiler', 'sql_profiler', self.report)
+        statement_timer.subscribe(self.record_statement)
+        app.extensions['sql_profiler'] = self
+
+    #  Recording
+    #  ----------------------------------------------------------------
+
+    def start_request(self):
+        # Budgets record even with the profiler off.
+        if self.enabled or self.watchers:
+            g.sql_profile = RequestProfile(request.method, request.full_path.rstrip('?'))
+
+    def end_request(self, response):
+        profile = g.pop('sql_profile', None)
+        if profile is None:
+            return response
+        profile.status = response.status_code
+        profile.elapsed = time.perf_counter() - profile.started
+        for watcher in self.watchers:
+            watcher.append(profile)
+        if not self.enabled:
+            return response
+
+        with self.lock:
+            self.history.append(profile)
+        timings = [
+            'db;dur={:.1f};desc="{} SQL"'.format(profile.sql_seconds * 1000, len(profile.statements)),
+            'app;dur={:.1f}'.format(profile.elapsed * 1000),
+        ]
+        repeated = profile.n_plus_one(self.threshold)
+        if repeated:
+            timings.append('n1;desc="{} repeated statements"'.format(len(repeated)))
+            for statement, count, seconds in repeated:
+                self.logger.warning('Possible N+1 in %s %s: %d x %s', profile.method, profile.path, count, statement)
+        response.headers.add('Server-Timing', ', '.join(timings))
+        return response
+
+    def record_statement(self, statement, seconds):
+        if has_request_context() and 'sql_profile' in g:
+            g.sql_profile.record(statement, seconds)
+
+    #  Reporting
+    #  ----------------------------------------------------------------
+
+    def report(self):
+        with self.lock:
+            profiles = list(self.history)
+        text = '\n\n'.join(profile.summary(self.threshold) for profile in reversed(profiles))
+        return Response(text or 'No requests profiled yet.\n', mimetype='text/plain')
+
+    @contextmanager
+    def budget(self, limit):
+        profiles = []
+        self.watchers.append(profiles)
+        try:
+            yield profiles
+        finally:
+            self.watchers.remove(profiles)
+        over = [profile for profile in profiles if len(profile.statements) > limit]
+        if over:
+            raise QueryBudgetExceeded('\n\n'.join(
+                ['Query budget of {} exceeded:'.format(limit)]
+                + [profile.summary(self.threshold) for profile in over]))
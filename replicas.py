@@ -0,0 +1,188 @@
+#----------------------------------------------------------------------------#
+# Read replicas.
+#----------------------------------------------------------------------------#
+
+# Views decorated with @replicas.read_only run their queries against a
+# read replica (round-robin over the healthy ones); everything else, and
+# anything a read-only view flushes or executes as INSERT/UPDATE/DELETE,
+# goes to the primary. Replicas are listed in SQLALCHEMY_REPLICA_URIS and
+# become Flask-SQLAlchemy binds named 'replica-0', 'replica-1', ...
+#
+# Replicas lag. A client whose request committed a write gets a cookie
+# sending its reads to the primary for REPLICA_STICKY_SECONDS, so it sees
+# its own write on the page it is redirected to; while it holds the
+# cookie, the response cache is bypassed too, since a stored page may have
+# been read from a replica before the write. For the same window after
+# any write in this process, pages read from a replica are not stored in
+# the response cache, which the write has just invalidated.
+#
+# A replica is checked at most every REPLICA_CHECK_INTERVAL seconds and
+# skipped while it is unreachable or, on PostgreSQL, further behind than
+# REPLICA_MAX_LAG seconds (0 disables the lag check). With no healthy
+# replica, reads fall back to the primary.
+
+import itertools
+import time
+from functools import wraps
+
+from flask import current_app, g, has_app_context, has_request_context, request
+from flask_sqlalchemy.session import Session as BaseSession
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from pool import engine_options
+
+STICKY_COOKIE = 'fyyur_primary_until'
+
+
+class RoutingSession(BaseSession):
+
+    # Used as db.session's class. Reads in a view that picked a replica
+    # (g.db_replica) go there; flushes and DML always use the primary.
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and has_app_context():
+            replica = g.get('db_replica')
+            if replica is not None and not getattr(clause, 'is_dml', False):
+                return self._db.engines[replica]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class Replica:
+
+    def __init__(self, key):
+        self.key = key
+        self.healthy = True
+        self.checked = float('-inf')
+
+
+class ReplicaRouter:
+
+    def __init__(self, app=None, db=None):
+        self.db = None
+        self.replicas = []
+        self.turn = itertools.count()
+        self.last_write = float('-inf')
+        if app is not None:
+            self.init_app(app, db)
+
+    # Adds the replica binds, so it has to run before db.init_app().
+    def init_app(self, app, db):
+        self.db = db
+        self.sticky_seconds = app.config.get('REPLICA_STICKY_SECONDS', 5)
+        self.check_interval = app.config.get('REPLICA_CHECK_INTERVAL', 10)
+        self.max_lag = app.config.get('REPLICA_MAX_LAG', 0)
+        self.last_write = float('-inf')
+
+        binds = app.config.setdefault('SQLALCHEMY_BINDS', {})
+        self.replicas = []
+        for index, uri in enumerate(app.config.get('SQLALCHEMY_REPLICA_URIS') or []):
+            key = 'replica-{}'.format(index)
+            binds[key] = dict(engine_options(app.config, uri), url=uri)
+            self.replicas.append(Replica(key))
+        app.extensions['replicas'] = self
+
+        app.after_request(self.set_sticky_cookie)
+        if not event.contains(Session, 'after_flush', self.mark_write):
+            event.listen(Session, 'after_flush', self.mark_write)
+            event.listen(Session, 'do_orm_execute', self.mark_bulk_write)
+            event.listen(Session, 'after_commit', self.record_write)
+            event.listen(Session, 'after_rollback', self.discard_write)
+            event.listen(Engine, 'handle_error', self.connection_failed)
+
+    #  Routing
+    #  ----------------------------------------------------------------
+
+    def read_only(self, view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            g.db_replica = self.pick()
+            if g.db_replica is not None and self.recently_written():
+                # Same flag as ResponseCache.skip().
+                g.cache_skip = True
+            return view(*args, **kwargs)
+        return wrapper
+
+    def pick(self):
+        if not self.replicas or self.pinned():
+            return None
+        for _ in range(len(self.replicas)):
+            replica = self.replicas[next(self.turn) % len(self.replicas)]
+            if self.available(replica):
+                return replica.key
+        return None
+
+    # Whether the current client wrote within REPLICA_STICKY_SECONDS.
+    def pinned(self):
+        return request.cookies.get(STICKY_COOKIE, 0, type=float) > time.time()
+
+    def recently_written(self):
+        return time.monotonic() - self.last_write < self.sticky_seconds
+
+    #  Health
+    #  ----------------------------------------------------------------
+
+    def available(self, replica):
+        now = time.monotonic()
+        if now - replica.checked >= self.check_interval:
+            replica.checked = now
+            replica.healthy = self.check(replica)
+        return replica.healthy
+
+    def check(self, replica):
+        try:
+            with self.db.engines[replica.key].connect() as connection:
+                lag = self.lag(connection)
+        except SQLAlchemyError as error:
+            current_app.logger.warning('Replica %s is unavailable: %s', replica.key, error)
+            return False
+        if self.max_lag and lag > self.max_lag:
+            current_app.logger.warning('Replica %s is %.1fs behind', replica.key, lag)
+            return False
+        return True
+
+    # Seconds the replica is behind the primary; 0 where the database
+    # can't tell (anything but a PostgreSQL standby).
+    def lag(self, connection):
+        if connection.dialect.name == 'postgresql':
+            return connection.exec_driver_sql(
+                'SELECT COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)'
+            ).scalar()
+        connection.exec_driver_sql('SELECT 1')
+        return 0
+
+    # A replica dropping connections mid-request is taken out of rotation
+    # until its next check.
+    def connection_failed(self, context):
+        if not context.is_disconnect or not has_app_context():
+            return
+        for replica in self.replicas:
+            if self.db.engines.get(replica.key) is context.engine:
+                replica.healthy = False
+                replica.checked = time.monotonic()
+
+    #  Writes
+    #  ----------------------------------------------------------------
+
+    def mark_write(self, session, flush_context):
+        session.info['replicas_wrote'] = True
+
+    def mark_bulk_write(self, orm_execute_state):
+        if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+            orm_execute_state.session.info['replicas_wrote'] = True
+
+    def record_write(self, session):
+        if session.info.pop('replicas_wrote', False):
+            self.last_write = time.monotonic()
+            if has_request_context():
+                g.db_wrote = True
+
+    def discard_write(self, session):
+        session.info.pop('replicas_wrote', None)
+
+    def set_sticky_cookie(self, response):
+        if self.replicas and g.get('db_wrote'):
+            response.set_cookie(STICKY_COOKIE, str(time.time() + self.sticky_seconds),
+                                max_age=int(self.sticky_seconds) + 1, httponly=True, samesite='Lax')
+        return response
@@ -0,0 +1,412 @@
+#----------------------------------------------------------------------------#
+# Search.
+#----------------------------------------------------------------------------#
+
+# Venue and artist search goes through a backend so the same views work
+# against PostgreSQL (tsvector + trigram, ranked in SQL) and against any
+# other database, where an in-process inverted index is used instead.
+
+import re
+import threading
+from bisect import bisect_left, insort
+
+from flask import current_app
+from sqlalchemy import func, or_
+from sqlalchemy.engine import make_url
+
+from changes import CommittedChanges
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(text):
+    return [token.lower() for token in TOKEN_RE.findall(text or '')]
+
+
+def escape_like(term):
+    return term.replace('\\', '\\\\').replace('%', r'\%').replace('_', r'\_')
+
+
+class SearchBackend:
+
+    def __init__(self, db, app=None):
+        self.db = db
+        self.app = app
+        self.models = {}
+
+    # Registered models need name, city and the stored
+    # upcoming_show_count counter.
+    def register(self, model):
+        self.models[model] = True
+
+    # Returns (total, rows) where rows are dicts with id, name and
+    # num_upcoming_shows, best match first.
+    def search(self, model, term, limit):
+        raise NotImplementedError
+
+
+#  PostgreSQL
+#  ----------------------------------------------------------------
+
+class PostgresSearchBackend(SearchBackend):
+
+    def search(self, model, term, limit):
+        criteria = [model.name.ilike('%{}%'.format(escape_like(term)))]
+        rank = func.similarity(model.name, term)
+
+        words = tokenize(term)
+        if words:
+            query = func.to_tsquery('simple', ' & '.join(word + ':*' for word in words))
+            criteria.append(model.search_vector.op('@@')(query))
+            rank = rank + func.ts_rank(model.search_vector, query)
+
+        # Rows and the total number of matches come back together: the
+        # window count runs over every match before the LIMIT.
+        results = (
+            self.db.session.query(
+                model.id,
+                model.name,
+                model.upcoming_show_count,
+                func.count().over().label('total')
+            )
+            .filter(or_(*criteria))
+            .filter(model.city != 'N/A')
+            .order_by(rank.desc(), model.name)
+            .limit(limit)
+            .all()
+        )
+
+        total = results[0].total if results else 0
+        rows = [
+            {
+                "id": result.id,
+                "name": result.name,
+                "num_upcoming_shows": result.upcoming_show_count,
+            }
+            for result in results
+        ]
+        return total, rows
+
+
+#  In-process
+#  ----------------------------------------------------------------
+
+class InvertedIndex:
+
+    # Searched by request threads while commits change it, so every
+    # access holds the lock.
+    def __init__(self):
+        self.postings = {}
+        self.tokens = []
+        self.names = {}
+        self.documents = {}
+        self.lock = threading.Lock()
+
+    def add(self, doc_id, name, text):
+        name_tokens = set(tokenize(name))
+        tokens = name_tokens | set(tokenize(text))
+        with self.lock:
+            self.discard(doc_id)
+            self.names[doc_id] = name
+            self.documents[doc_id] = (name_tokens, tokens)
+            for token in tokens:
+                if token not in self.postings:
+                    self.postings[token] = set()
+                    insort(self.tokens, token)
+                self.postings[token].add(doc_id)
+
+    def remove(self, doc_id):
+        with self.lock:
+            self.discard(doc_id)
+
+    # Callers hold the lock.
+    def discard(self, doc_id):
+        if doc_id not in self.documents:
+            return
+        _, tokens = self.documents.pop(doc_id)
+        del self.names[doc_id]
+        for token in tokens:
+            postings = self.postings[token]
+            postings.discard(doc_id)
+            if not postings:
+                del self.postings[token]
+                del self.tokens[bisect_left(self.tokens, token)]
+
+    # Returns (total, [(doc_id, name)]) for the first limit matches.
+    def search(self, words, limit):
+        with self.lock:
+            matches = self.lookup(words)
+            return len(matches), [(doc_id, self.names[doc_id]) for doc_id in matches[:limit]]
+
+    # Every indexed token starting with prefix, found by binary search
+    # over the sorted token list. Callers hold the lock.
+    def expand(self, prefix):
+        start = bisect_left(self.tokens, prefix)
+        end = start
+        while end < len(self.tokens) and self.tokens[end].startswith(prefix):
+            end += 1
+        return self.tokens[start:end]
+
+    # Documents must match every query word by prefix; a match in the
+    # name counts double so name hits rank above city/genre hits. Callers
+    # hold the lock.
+    def lookup(self, words):
+        if not words:
+            return sorted(self.names, key=lambda doc_id: self.names[doc_id].lower())
+
+        scores = None
+        for word in words:
+            matches = {}
+            for token in self.expand(word):
+                for doc_id in self.postings[token]:
+                    weight = 2 if token in self.documents[doc_id][0] else 1
+                    matches[doc_id] = max(matches.get(doc_id, 0), weight)
+            if scores is None:
+                scores = matches
+            else:
+                scores = {
+                    doc_id: score + matches[doc_id]
+                    for doc_id, score in scores.items() if doc_id in matches
+                }
+            if not scores:
+                return []
+
+        return sorted(scores, key=lambda doc_id: (-scores[doc_id], self.names[doc_id].lower()))
+
+
+class MemorySearchBackend(SearchBackend, CommittedChanges):
+
+    def __init__(self, db, app=None):
+        super().__init__(db, app)
+        self.indexes = {}
+        # Held while an index is built and while commits update one, so a
+        # commit landing mid-build waits for the index instead of missing it.
+        self.lock = threading.Lock()
+        self.listen(app)
+
+    @staticmethod
+    def document(obj):
+        return ' '.join([obj.city or '', obj.state or ''] + [genre.name for genre in obj.genres])
+
+    # The index for a model is built from the database on first use and
+    # kept current from committed writes afterwards.
+    def index_for(self, model):
+        index = self.indexes.get(model)
+        if index is not None:
+            return index
+        with self.lock:
+            # Another thread may have built it while this one waited.
+            if model not in self.indexes:
+                index = InvertedIndex()
+                rows = (
+                    self.db.session.query(model)
+                    .filter(model.city != 'N/A')
+                )
+                for row in rows:
+                    index.add(row.id, row.name, self.document(row))
+                self.indexes[model] = index
+            return self.indexes[model]
+
+    def search(self, model, term, limit):
+        total, page = self.index_for(model).search(tokenize(term), limit)
+
+        counts = {}
+        if page:
+            counts = dict(
+                self.db.session.query(model.id, model.upcoming_show_count)
+                .filter(model.id.in_([doc_id for doc_id, _ in page]))
+                .all()
+            )
+
+        rows = [
+            {
+                "id": doc_id,
+                "name": name,
+                "num_upcoming_shows": counts.get(doc_id, 0),
+            }
+            for doc_id, name in page
+        ]
+        return total, rows
+
+    def snapshot(self, obj):
+        return obj.name, obj.city, self.document(obj)
+
+    def update(self, model, doc_id, snapshot):
+        with self.lock:
+            index = self.indexes.get(model)
+            if index is None:
+                return
+            if snapshot is None or snapshot[1] == 'N/A':
+                index.remove(doc_id)
+            else:
+                name, _, text = snapshot
+                index.add(doc_id, name, text)
+
+    def reset(self, model):
+        with self.lock:
+            self.indexes.pop(model, None)
+
+
+BACKENDS = {
+    'postgres': PostgresSearchBackend,
+    'memory': MemorySearchBackend,
+}
+
+
+def create_search_backend(app, db):
+    name = app.config.get('SEARCH_BACKEND', 'auto')
+    if name == 'auto':
+        # Decided from the URL so startup doesn't have to create the engine.
+        url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+        name = 'postgres' if url.get_backend_name() == 'postgresql' else 'memory'
+    return BACKENDS[name](db, app)
+
+
+class Search:
+
+    # Flask extension: models are registered up front, and each app gets
+    # the backend its configuration asks for in init_app().
+    def __init__(self):
+        self.models = []
+
+    def register(self, model):
+        self.models.append(model)
+
+    def init_app(self, app, db):
+        backend = create_search_backend(app, db)
+        for model in self.models:
+            backend.register(model)
+        app.extensions['search'] = backend
+
+    def search(self, model, term, limit):
+        return current_app.extensions['search'].search(model, term, limit)
+
+
+#  Suggestions
+#  ----------------------------------------------------------------
+
+class SuggestIndex(CommittedChanges):
+
+    # Typeahead over venue and artist names. Every word position of a
+    # name is kept in one sorted array, so "note" finds "The Blue Note",
+    # and a lookup is a binary search plus a short scan. The array is
+    # loaded from the database once and then only changed by commits.
+    #
+    # Request threads look names up while commits change them, so every
+    # access holds the lock, across both checking whether the index is
+    # loaded and reading or changing it. A commit that lands while a load
+    # runs waits for it and is then applied to the loaded index.
+    def __init__(self, db, app=None):
+        self.db = db
+        self.models = {}
+        self.keys = []
+        self.entries = {}
+        self.loaded = False
+        self.lock = threading.Lock()
+        self.listen(app)
+
+    def register(self, model, kind):
+        self.models[model] = kind
+
+    @staticmethod
+    def name_keys(name):
+        words = tokenize(name)
+        return [' '.join(words[i:]) for i in range(len(words))]
+
+    # Callers hold the lock.
+    def load(self):
+        keys = []
+        entries = {}
+        for model, kind in self.models.items():
+            rows = (
+                self.db.session.query(model.id, model.name)
+                .filter(model.city != 'N/A')
+            )
+            for row in rows:
+                entry = (kind, row.id)
+                entries[entry] = (row.name, self.name_keys(row.name))
+                keys.extend((key, entry) for key in entries[entry][1])
+        keys.sort()
+        self.keys, self.entries = keys, entries
+        self.loaded = True
+
+    # Callers hold the lock.
+    def add(self, model, doc_id, name):
+        entry = (self.models[model], doc_id)
+        keys = self.name_keys(name)
+        self.discard(entry)
+        self.entries[entry] = (name, keys)
+        for key in keys:
+            insort(self.keys, (key, entry))
+
+    # Callers hold the lock.
+    def discard(self, entry):
+        if entry not in self.entries:
+            return
+        _, keys = self.entries.pop(entry)
+        for key in keys:
+            del self.keys[bisect_left(self.keys, (key, entry))]
+
+    def suggest(self, prefix, limit, kind=None):
+        prefix = ' '.join(tokenize(prefix))
+        if not prefix:
+            return []
+
+        results = []
+        seen = set()
+        with self.lock:
+            if not self.loaded:
+                self.load()
+            position = bisect_left(self.keys, (prefix,))
+            while position < len(self.keys) and len(results) < limit:
+                key, entry = self.keys[position]
+                if not key.startswith(prefix):
+                    break
+                position += 1
+                if entry in seen or (kind is not None and entry[0] != kind):
+                    continue
+                seen.add(entry)
+                results.append({
+                    "type": entry[0],
+                    "id": entry[1],
+                    "name": self.entries[entry][0],
+                })
+        return results
+
+    def snapshot(self, obj):
+        return obj.name, obj.city
+
+    def update(self, model, doc_id, snapshot):
+        with self.lock:
+            # Until the first load there is nothing to keep current; the
+            # load reads the committed rows.
+            if not self.loaded:
+                return
+            if snapshot is None or snapshot[1] == 'N/A':
+                self.discard((self.models[model], doc_id))
+            else:
+                self.add(model, doc_id, snapshot[0])
+
+    def reset(self, model):
+        with self.lock:
+            self.loaded = False
+
+
+class Suggest:
+
+    # Flask extension, like Search: models are registered up front, and
+    # each app gets its own index over its own database in init_app().
+    def __init__(self):
+        self.models = {}
+
+    def register(self, model, kind):
+        self.models[model] = kind
+
+    def init_app(self, app, db):
+        index = SuggestIndex(db, app)
+        for model, kind in self.models.items():
+            index.register(model, kind)
+        app.extensions['suggest'] = index
+
+    def suggest(self, prefix, limit, kind=None):
+        return current_app.extensions['suggest'].suggest(prefix, limit, kind)
@@ -0,0 +1,160 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import sys
+from datetime import datetime
+from flask import Blueprint, render_template, request, flash, jsonify
+from sqlalchemy import tuple_
+from models import db, Venue, Artist, Show, refresh_show_counters
+from extensions import response_cache, replicas
+from pages import page_size, show_cursor, encode_show_cursor, split_page
+
+bp = Blueprint('shows', __name__)
+
+
+#----------------------------------------------------------------------------#
+# Controllers.
+#----------------------------------------------------------------------------#
+
+#  List Shows
+#  ----------------------------------------------------------------
+
+@bp.route('/shows')
+@response_cache.cached('shows')
+@replicas.read_only
+def shows():
+
+  shows_past = []
+  shows_upcoming = []
+
+  shows = (
+    db.session.query(
+      Show.id,
+      Show.date,
+      Show.venue_id,
+      Venue.name.label('venue_name'),
+      Show.artist_id,
+      Artist.name.label('artist_name'),
+      Artist.image_link.label('artist_image_link')
+    )
+    .join(Venue, Show.venue_id == Venue.id)
+    .join(Artist, Show.artist_id == Artist.id)
+    .filter(Show.date.isnot(None))
+    .order_by(Show.date.asc(), Show.id.asc())
+  )
+
+  after = show_cursor()
+  if after is not None:
+    shows = shows.filter(tuple_(Show.date, Show.id) > after)
+
+  limit = page_size()
+  shows, has_next = split_page(shows.limit(limit + 1).all(), limit)
+
+  now = datetime.now()
+
+  # Start times are formatted by the template, inside each tile's cached
+  # fragment, so tiles served from the fragment cache skip the work.
+  for show in shows:
+
+    show_info = {
+      "id": show.id,
+      "venue_id": show.venue_id,
+      "venue_name": show.venue_name,
+      "artist_id": show.artist_id,
+      "artist_name": show.artist_name,
+      "artist_image_link": show.artist_image_link,
+      "start_time": show.date
+    }
+
+    if show.date < now:
+      shows_past.append(show_info)
+    else:
+      shows_upcoming.append(show_info)
+
+
+  data = {
+    "past_shows": shows_past,
+    "upcoming_shows": shows_upcoming
+  }
+
+  next_after = encode_show_cursor(shows[-1]) if has_next else None
+
+  return render_template('pages/shows.html', shows=data, next_after=next_after)
+
+
+#  Create Shows
+#  ----------------------------------------------------------------
+
+@bp.route('/shows/create')
+def create_shows():
+  from forms import ShowForm
+  form = ShowForm()
+  return render_template('forms/new_show.html', form=form)
+
+@bp.route('/shows/create', methods=['POST'])
+def create_show_submission():
+  from forms import ShowForm
+
+  form = ShowForm(request.form)
+
+  error = False
+
+  try:
+    show = Show(
+      artist_id =   form.artist_id.data,
+      venue_id =    form.venue_id.data,
+      date =        form.start_time.data
+    )
+
+    db.session.add(show)
+    db.session.flush()
+
+    refresh_show_counters(Venue, [show.venue_id])
+    refresh_show_counters(Artist, [show.artist_id])
+
+    db.session.commit()
+
+    flash('Show was successfully listed!')
+  except:
+    db.session.rollback()
+    error = True
+    flash('An error occured. The show could not be listed.')
+    print(sys.exc_info())
+  if error:
+    return render_template('/forms/new_show.html')
+  else:
+    return render_template('pages/home.html')
+
+
+#  Delete Shows
+#  ----------------------------------------------------------------
+
+@bp.route('/shows/<show_id>', methods=['DELETE'])
+def delete_show(show_id):
+
+  error = False
+
+  show = Show.query.get_or_404(show_id)
+
+  try:
+    db.session.delete(show)
+    db.session.flush()
+    refresh_show_counters(Venue, [show.venue_id])
+    refresh_show_counters(Artist, [show.artist_id])
+    db.session.commit()
+    flash('Show successfully deleted.')
+  except:
+    print('4')
+    db.session.rollback()
+    error = True
+    flash('Something went wrong.')
+    print(sys.exc_info())
+  finally:
+    db.session.close()
+  if error:
+    print('There was a problem deleting the show!!')
+    return jsonify({ 'success': False })
+  else:
+    print('Show deleted successfully!')
+    return jsonify({ 'success': True })
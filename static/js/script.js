@@ -1,4 +1,31 @@
 window.parseISOString = function parseISOString(s) {
   var b = s.split(/\D+/);
   return new Date(Date.UTC(b[0], --b[1], b[2], b[3], b[4], b[5], b[6]));
-};
\ No newline at end of file
+};
+// Fill the search box's datalist with name suggestions as the user types.
+document.addEventListener('DOMContentLoaded', function() {
+  var inputs = document.querySelectorAll('input[data-suggest]');
+  for (var i = 0; i < inputs.length; i++) {
+    (function(input) {
+      var list = document.getElementById(input.getAttribute('list'));
+      var latest = 0;
+      input.addEventListener('input', function() {
+        var request = ++latest;
+        var url = '/api/search/suggest?type=' + input.dataset.suggest + '&q=' + encodeURIComponent(input.value);
+        fetch(url)
+          .then(function(response) { return response.json(); })
+          .then(function(data) {
+            if (request !== latest) {
+              return;
+            }
+            list.innerHTML = '';
+            data.suggestions.forEach(function(suggestion) {
+              var option = document.createElement('option');
+              option.value = suggestion.name;
+              list.appendChild(option);
+            });
+          });
+      });
+    })(inputs[i]);
+  }
+});
@@ -0,0 +1,84 @@
+#----------------------------------------------------------------------------#
+# Test fixtures.
+#----------------------------------------------------------------------------#
+
+# Tests build the app with create_app() from config.py's settings plus a
+# few overrides: an in-memory SQLite database by default, and no caching,
+# so every request runs its real queries.
+#
+# query_budget is sql_profiler.budget(): a block whose requests run more
+# statements than the limit fails, with the profiler's report of each one.
+#
+#   def test_venue_page(client, query_budget):
+#       with query_budget(4):
+#           client.get('/venues/1')
+#
+# replicated_app runs against two SQLite files, a primary and a read
+# replica with the same schema and no replication between them; a test
+# writes different rows to each to see where a query went.
+
+import pytest
+
+import config
+from app import create_app
+from extensions import sql_profiler
+from models import db, seed_sentinels, sentinel_ids
+
+
+def testing_config(**overrides):
+    settings = {name: getattr(config, name) for name in dir(config) if name.isupper()}
+    settings.update(
+        TESTING=True,
+        SECRET_KEY='test',
+        WTF_CSRF_ENABLED=False,
+        SQLALCHEMY_DATABASE_URI='sqlite://',
+        SQLALCHEMY_REPLICA_URIS=[],
+        CACHE_ENABLED=False,
+        TEMPLATE_BYTECODE_CACHE_DIR='',
+        TEMPLATES_PRERENDER=False,
+    )
+    settings.update(overrides)
+    return type('TestConfig', (), settings)
+
+
+@pytest.fixture
+def make_app():
+    return lambda **overrides: create_app(testing_config(**overrides))
+
+
+@pytest.fixture
+def app(make_app):
+    app = make_app()
+    with app.app_context():
+        # The default database only: db keeps the replica binds of apps
+        # other tests made, which this app doesn't have.
+        db.create_all(bind_key=None)
+        # Sentinel ids are cached per process; each test has a new database.
+        sentinel_ids.clear()
+        seed_sentinels()
+        yield app
+        db.session.remove()
+        db.drop_all(bind_key=None)
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def query_budget(app):
+    return sql_profiler.budget
+
+
+@pytest.fixture
+def replicated_app(make_app, tmp_path):
+    app = make_app(
+        SQLALCHEMY_DATABASE_URI='sqlite:///{}'.format(tmp_path / 'primary.db'),
+        SQLALCHEMY_REPLICA_URIS=['sqlite:///{}'.format(tmp_path / 'replica.db')],
+    )
+    with app.app_context():
+        for engine in db.engines.values():
+            db.metadata.create_all(engine)
+        yield app
+        db.session.remove()
@@ -0,0 +1,38 @@
+from datetime import datetime
+
+import babel.dates
+import pytest
+
+import dates
+
+VALUES = [datetime(2019, 5, 21, 21, 30), datetime(2035, 4, 1, 9, 5, 7), datetime(2019, 12, 31, 0, 0)]
+
+
+@pytest.mark.parametrize('locale', ['en', 'en_GB', 'de', 'fr', 'ja'])
+@pytest.mark.parametrize('format', ['full', 'long', 'medium', 'short', 'EEEE MMMM, d, y h:mma', 'EE MM, dd, y h:mma'])
+def test_matches_babel(format, locale):
+    for value in VALUES:
+        expected = babel.dates.format_datetime(value, format, locale=locale)
+        assert dates.format_datetime(value, format, locale) == expected
+        assert dates.format_datetime(value.isoformat(), format, locale) == expected
+
+
+def test_falls_back_to_dateutil_for_other_strings():
+    assert dates.format_datetime('May 21 2019 9:30pm', 'short') == babel.dates.format_datetime(VALUES[0], 'short')
+
+
+def test_patterns_and_values_are_cached():
+    dates.compiled_pattern.cache_clear()
+    dates.format_cached.cache_clear()
+
+    for _ in range(3):
+        for value in VALUES:
+            dates.format_datetime(value, 'full', 'de')
+            dates.format_datetime(value.isoformat(), 'full', 'de')
+
+    # One pattern compiled, then reused for every distinct value.
+    assert dates.compiled_pattern.cache_info().misses == 1
+    assert dates.compiled_pattern.cache_info().hits == len(VALUES) - 1
+    # Each distinct value formatted once; strings and datetimes share entries.
+    info = dates.format_cached.cache_info()
+    assert (info.misses, info.hits, info.currsize) == (len(VALUES), 5 * len(VALUES), len(VALUES))
@@ -0,0 +1,104 @@
+# The listing and search queries must be answerable from indexes. This
+# needs PostgreSQL (the name searches use pg_trgm), so it only runs when
+# TEST_DATABASE_URL points at one:
+#
+#   TEST_DATABASE_URL=postgresql://localhost/fyyur_test python -m pytest tests/test_indexes.py
+#
+# The database is scratch: its public schema is dropped and rebuilt from
+# the migrations.
+
+import os
+from datetime import datetime, timedelta
+
+import flask_migrate
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+from models import db, Venue, Artist, Show, seed_sentinels, sentinel_ids
+
+DATABASE_URL = os.environ.get('TEST_DATABASE_URL', '')
+MIGRATIONS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+
+pytestmark = pytest.mark.skipif(
+    not DATABASE_URL or make_url(DATABASE_URL).get_backend_name() != 'postgresql',
+    reason='TEST_DATABASE_URL is not a PostgreSQL database')
+
+
+@pytest.fixture
+def client(make_app):
+    app = make_app(SQLALCHEMY_DATABASE_URI=DATABASE_URL, SEARCH_BACKEND='postgres')
+    with app.app_context():
+        with db.engine.begin() as conn:
+            conn.exec_driver_sql('DROP SCHEMA public CASCADE')
+            conn.exec_driver_sql('CREATE SCHEMA public')
+        flask_migrate.upgrade(directory=MIGRATIONS)
+        sentinel_ids.clear()
+        seed_sentinels()
+
+        artist = Artist(name='The Blue Notes', city='San Francisco', state='CA', phone='555-0101',
+                        image_link='http://example.com/artist.png')
+        venues = [
+            Venue(name='Blue Room {}'.format(i), city='San Francisco' if i % 2 else 'Oakland', state='CA',
+                  address='1 Main St', phone='555-0100', image_link='http://example.com/venue.png')
+            for i in range(20)
+        ]
+        db.session.add_all(venues + [artist])
+        db.session.flush()
+        db.session.add_all([
+            Show(venue_id=venue.id, artist_id=artist.id, date=datetime.now() + timedelta(days=days))
+            for venue in venues for days in (-3, 5)
+        ])
+        db.session.commit()
+        with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+            conn.exec_driver_sql('ANALYZE')
+
+        yield app.test_client()
+        db.session.remove()
+
+
+def captured_selects(client, method, path, **kwargs):
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', capture)
+    try:
+        response = client.open(path, method=method, **kwargs)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', capture)
+    assert response.status_code == 200
+    assert statements
+    return statements
+
+
+def plan(statement, parameters):
+    with db.engine.connect() as conn:
+        # Tables this small are always cheapest to scan whole. With
+        # sequential scans priced out, the planner still falls back to one
+        # when no index can serve the query, which is what is checked.
+        conn.exec_driver_sql('SET enable_seqscan = off')
+        return '\n'.join(row[0] for row in conn.exec_driver_sql('EXPLAIN ' + statement, parameters))
+
+
+def assert_index_scans(client, method, path, **kwargs):
+    for statement, parameters in captured_selects(client, method, path, **kwargs):
+        text = plan(statement, parameters)
+        assert 'Seq Scan' not in text, '{}\n\n{}'.format(statement, text)
+        assert 'Index Scan' in text or 'Index Only Scan' in text, '{}\n\n{}'.format(statement, text)
+
+
+def test_venue_listing_uses_indexes(client):
+    assert_index_scans(client, 'GET', '/venues')
+    assert_index_scans(client, 'GET', '/venues?city=Oakland&state=CA')
+
+
+def test_show_listing_uses_indexes(client):
+    assert_index_scans(client, 'GET', '/shows')
+
+
+def test_name_search_uses_indexes(client):
+    assert_index_scans(client, 'POST', '/venues/search', data={'search_term': 'blue'})
+    assert_index_scans(client, 'POST', '/artists/search', data={'search_term': 'notes'})
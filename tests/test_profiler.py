@@ -0,0 +1,15 @@
+import pytest
+
+from profiler import QueryBudgetExceeded, normalize
+
+
+def test_in_lists_of_any_length_normalize_alike():
+    assert normalize('SELECT * FROM shows WHERE id IN (?, ?)') == normalize('SELECT * FROM shows WHERE id IN (?)')
+    assert (normalize('SELECT * FROM shows WHERE id IN (%(id_1_1)s, %(id_1_2)s, %(id_1_3)s)')
+            == normalize('SELECT * FROM shows WHERE id IN (%(id_1_1)s)'))
+
+
+def test_query_budget_fails_requests_over_the_limit(client, query_budget):
+    with pytest.raises(QueryBudgetExceeded):
+        with query_budget(0):
+            client.get('/venues')
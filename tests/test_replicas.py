@@ -0,0 +1,91 @@
+import time
+
+from sqlalchemy import insert, select
+
+from extensions import replicas, response_cache
+from models import db, Venue
+from replicas import STICKY_COOKIE
+
+
+def add_venue(engine, name):
+    with engine.begin() as connection:
+        connection.execute(insert(Venue.__table__).values(
+            name=name, city='Oakland', state='CA', address='1 Main St', phone='555-0100',
+            image_link='http://example.com/venue.png'
+        ))
+
+
+def venue_names(engine):
+    with engine.connect() as connection:
+        return set(connection.scalars(select(Venue.__table__.c.name)))
+
+
+def listing(client):
+    return client.get('/venues').get_data(as_text=True)
+
+
+def test_read_only_views_read_from_the_replica(replicated_app):
+    add_venue(db.engines[None], 'Primary Hall')
+    add_venue(db.engines['replica-0'], 'Replica Hall')
+
+    page = listing(replicated_app.test_client())
+    assert 'Replica Hall' in page
+    assert 'Primary Hall' not in page
+
+
+def test_writes_go_to_the_primary_and_pin_the_client_to_it(replicated_app):
+    add_venue(db.engines[None], 'Primary Hall')
+    add_venue(db.engines['replica-0'], 'Replica Hall')
+    client = replicated_app.test_client()
+
+    response = client.post('/venues/create', data={
+        'name': 'New Hall', 'city': 'Oakland', 'state': 'CA', 'address': '2 Main St',
+        'phone': '555-0102', 'image_link': 'http://example.com/new.png',
+    })
+    assert response.status_code == 302
+    assert STICKY_COOKIE in response.headers['Set-Cookie']
+    assert 'New Hall' in venue_names(db.engines[None])
+    assert 'New Hall' not in venue_names(db.engines['replica-0'])
+
+    # The replica hasn't seen the write; the client reads from the primary.
+    page = listing(client)
+    assert 'New Hall' in page
+    assert 'Replica Hall' not in page
+
+
+def test_pinned_clients_bypass_the_response_cache(replicated_app, monkeypatch):
+    monkeypatch.setattr(response_cache, 'enabled', True)
+    add_venue(db.engines[None], 'Primary Hall')
+    add_venue(db.engines['replica-0'], 'Replica Hall')
+
+    client = replicated_app.test_client()
+    assert 'Replica Hall' in listing(client)
+    assert client.get('/venues').headers['X-Cache'] == 'HIT'
+
+    pinned = replicated_app.test_client()
+    pinned.set_cookie('localhost', STICKY_COOKIE, str(time.time() + 60))
+    response = pinned.get('/venues')
+    assert 'X-Cache' not in response.headers
+    assert 'Primary Hall' in response.get_data(as_text=True)
+
+
+def test_lagging_replica_falls_back_to_the_primary(replicated_app, monkeypatch):
+    add_venue(db.engines[None], 'Primary Hall')
+    add_venue(db.engines['replica-0'], 'Replica Hall')
+    monkeypatch.setattr(replicas, 'max_lag', 5)
+    monkeypatch.setattr(replicas, 'lag', lambda connection: 30.0)
+
+    assert 'Primary Hall' in listing(replicated_app.test_client())
+
+
+def test_unreachable_replica_falls_back_to_the_primary(make_app, tmp_path):
+    app = make_app(
+        SQLALCHEMY_DATABASE_URI='sqlite:///{}'.format(tmp_path / 'primary.db'),
+        SQLALCHEMY_REPLICA_URIS=['sqlite:///{}'.format(tmp_path / 'missing' / 'replica.db')],
+    )
+    with app.app_context():
+        db.metadata.create_all(db.engine)
+        add_venue(db.engine, 'Primary Hall')
+
+        assert 'Primary Hall' in listing(app.test_client())
+        assert not replicas.replicas[0].healthy
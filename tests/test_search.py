@@ -0,0 +1,81 @@
+from extensions import search_backend
+from models import db, Venue, Artist
+
+VENUE_FORM = {
+    'city': 'Oakland', 'state': 'CA', 'address': '1 Main St', 'phone': '555-0100',
+    'image_link': 'http://example.com/venue.png',
+}
+
+
+def add(model, name, city='Oakland', **fields):
+    if model is Venue:
+        fields.setdefault('address', '1 Main St')
+    row = model(name=name, city=city, state='CA', phone='555-0100',
+                image_link='http://example.com/image.png', **fields)
+    db.session.add(row)
+    db.session.commit()
+    return row.id
+
+
+def names(model, term):
+    total, rows = search_backend.search(model, term, 10)
+    assert total == len(rows)
+    return [row['name'] for row in rows]
+
+
+def test_tests_search_an_in_process_index(app):
+    assert type(app.extensions['search']).__name__ == 'MemorySearchBackend'
+
+
+# Name matches rank above matches on the city or genres; ties go by name.
+def test_venue_search_ranks_name_matches_first(app):
+    add(Venue, 'Red Room', city='Blue Lake')
+    add(Venue, 'The Blue Note')
+    add(Venue, 'Blue Moon Saloon')
+    add(Venue, 'Green Door')
+
+    assert names(Venue, 'blue') == ['Blue Moon Saloon', 'The Blue Note', 'Red Room']
+    assert names(Venue, 'blu moon') == ['Blue Moon Saloon']
+    assert names(Venue, 'oakland green') == ['Green Door']
+
+
+def test_artist_search_ranks_name_matches_first(app):
+    add(Artist, 'Guns N Petals')
+    add(Artist, 'The Wild Sax Band', city='Petaluma')
+    add(Artist, 'Matt Quevedo')
+
+    assert names(Artist, 'pet') == ['Guns N Petals', 'The Wild Sax Band']
+    assert names(Artist, 'quevedo') == ['Matt Quevedo']
+
+
+def test_search_follows_created_edited_and_deleted_venues(app, client):
+    add(Venue, 'The Blue Note')
+    assert names(Venue, 'hall') == []
+
+    client.post('/venues/create', data=dict(VENUE_FORM, name='Music Hall'))
+    assert names(Venue, 'hall') == ['Music Hall']
+    venue_id = db.session.query(Venue.id).filter_by(name='Music Hall').scalar()
+
+    client.post('/venues/{}/edit'.format(venue_id), data=dict(VENUE_FORM, name='Jazz Cellar'))
+    assert names(Venue, 'hall') == []
+    assert names(Venue, 'jazz') == ['Jazz Cellar']
+
+    client.delete('/venues/{}'.format(venue_id))
+    assert names(Venue, 'jazz') == []
+    assert names(Venue, 'blue') == ['The Blue Note']
+
+
+# Each app has its own index over its own database.
+def test_apps_do_not_share_search_indexes(app, make_app):
+    add(Venue, 'The Blue Note')
+    assert names(Venue, 'blue') == ['The Blue Note']
+
+    other = make_app()
+    with other.app_context():
+        db.create_all(bind_key=None)
+        assert names(Venue, 'blue') == []
+        add(Venue, 'Blue Moon Saloon')
+        assert names(Venue, 'blue') == ['Blue Moon Saloon']
+        db.drop_all(bind_key=None)
+
+    assert names(Venue, 'blue') == ['The Blue Note']
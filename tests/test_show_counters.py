@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta
+
+from models import db, Venue, Artist, Show
+
+
+def add_venue_with_show(start):
+    artist = Artist(name='Artist', city='San Francisco', state='CA', phone='555-0101',
+                    image_link='http://example.com/artist.png')
+    venue = Venue(name='Venue', city='Oakland', state='CA', address='1 Main St',
+                  phone='555-0100', image_link='http://example.com/venue.png',
+                  upcoming_show_count=1, next_show_at=start)
+    db.session.add_all([artist, venue])
+    db.session.flush()
+    db.session.add(Show(venue_id=venue.id, artist_id=artist.id, date=start))
+    db.session.commit()
+    return venue.id
+
+
+def run(app, *args):
+    result = app.test_cli_runner().invoke(args=list(args))
+    assert result.exit_code == 0, result.output
+    return result.output
+
+
+# The counters are derived from shows: refreshing them must leave the
+# detail page's ETag alone, so revalidating clients still get a 304.
+def test_rollover_leaves_the_etag_unchanged(app, client):
+    # next_show_at points at a show that has started, as it does when
+    # the rollover command comes round.
+    venue_id = add_venue_with_show(datetime.now() - timedelta(hours=1))
+    etag = client.get('/venues/{}'.format(venue_id)).headers['ETag']
+
+    assert 'Rolled over 1 venues' in run(app, 'shows', 'rollover')
+    venue = db.session.get(Venue, venue_id)
+    assert (venue.upcoming_show_count, venue.past_show_count, venue.next_show_at) == (0, 1, None)
+
+    response = client.get('/venues/{}'.format(venue_id), headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+
+
+def test_reconcile_leaves_updated_at_unchanged(app):
+    venue_id = add_venue_with_show(datetime.now() + timedelta(days=3))
+    updated_at = db.session.get(Venue, venue_id).updated_at
+    db.session.expire_all()
+
+    run(app, 'shows', 'reconcile')
+    assert db.session.get(Venue, venue_id).updated_at == updated_at
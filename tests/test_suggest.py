@@ -0,0 +1,66 @@
+from models import db, Venue, Artist
+
+VENUE_FORM = {
+    'city': 'Oakland', 'state': 'CA', 'address': '1 Main St', 'phone': '555-0100',
+    'image_link': 'http://example.com/venue.png',
+}
+
+
+def add(model, name):
+    fields = {'address': '1 Main St'} if model is Venue else {}
+    row = model(name=name, city='Oakland', state='CA', phone='555-0100',
+                image_link='http://example.com/image.png', **fields)
+    db.session.add(row)
+    db.session.commit()
+    return row.id
+
+
+def suggest(client, q, **args):
+    response = client.get('/api/search/suggest', query_string=dict(args, q=q))
+    assert response.status_code == 200
+    return response.get_json()['suggestions']
+
+
+def names(client, q, **args):
+    return [suggestion['name'] for suggestion in suggest(client, q, **args)]
+
+
+def test_suggestions_match_any_word_of_a_name_by_prefix(client):
+    venue_id = add(Venue, 'The Blue Note')
+    add(Venue, 'Green Door')
+
+    assert names(client, 'the bl') == ['The Blue Note']
+    assert names(client, 'blu') == ['The Blue Note']
+    assert names(client, 'note') == ['The Blue Note']
+    assert names(client, 'door') == ['Green Door']
+    assert names(client, 'lue') == []
+    assert suggest(client, 'note')[0] == {
+        'type': 'venue', 'id': venue_id, 'name': 'The Blue Note', 'url': '/venues/{}'.format(venue_id),
+    }
+
+
+def test_suggestions_filter_by_type(client):
+    add(Venue, 'The Blue Note')
+    add(Artist, 'Blue Moon Trio')
+
+    assert sorted(names(client, 'blue')) == ['Blue Moon Trio', 'The Blue Note']
+    assert names(client, 'blue', type='artist') == ['Blue Moon Trio']
+    assert names(client, 'blue', type='venue') == ['The Blue Note']
+
+
+def test_renames_replace_the_old_name(client):
+    venue_id = add(Venue, 'The Blue Note')
+    assert names(client, 'blu') == ['The Blue Note']
+
+    client.post('/venues/{}/edit'.format(venue_id), data=dict(VENUE_FORM, name='Jazz Cellar'))
+    assert names(client, 'blu') == []
+    assert names(client, 'cell') == ['Jazz Cellar']
+
+
+def test_deletes_drop_suggestions(client):
+    venue_id = add(Venue, 'The Blue Note')
+    add(Venue, 'Blue Moon Saloon')
+    assert len(names(client, 'blue')) == 2
+
+    client.delete('/venues/{}'.format(venue_id))
+    assert names(client, 'blue') == ['Blue Moon Saloon']
@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta
+
+import venues as venue_views
+from models import db, Venue, Artist, Show
+
+
+def add_venues(count, artist):
+    venues = [
+        Venue(name='Venue {}'.format(i), city='City {}'.format(i % 7), state='CA', address='1 Main St',
+              phone='555-0100', image_link='http://example.com/venue.png')
+        for i in range(count)
+    ]
+    db.session.add_all(venues)
+    db.session.flush()
+    db.session.add_all([
+        Show(venue_id=venue.id, artist_id=artist.id, date=datetime.now() + timedelta(days=days))
+        for venue in venues for days in (-3, 5, 12)
+    ])
+    db.session.commit()
+
+
+def statements(client, query_budget, limit):
+    with query_budget(limit) as profiles:
+        assert client.get('/venues').status_code == 200
+    return len(profiles[0].statements)
+
+
+# /venues used to run a query per city and a COUNT per venue; it must
+# cost the same number of statements however many venues there are.
+def test_venue_listing_runs_a_fixed_number_of_statements(client, query_budget):
+    artist = Artist(name='Artist', city='San Francisco', state='CA', phone='555-0101',
+                    image_link='http://example.com/artist.png')
+    db.session.add(artist)
+    db.session.commit()
+
+    n = 5
+    add_venues(n, artist)
+    small = statements(client, query_budget, 2)
+
+    add_venues(9 * n, artist)
+    large = statements(client, query_budget, 2)
+
+    assert small == large
+
+
+def listing_pages(client, monkeypatch, limit, **args):
+    # The areas and next-page cursor each /venues page rendered.
+    pages = []
+    monkeypatch.setattr(venue_views, 'render_template',
+                        lambda template, **context: pages.append(context) or '')
+    after = None
+    while True:
+        query = dict(args, limit=limit, **({'after': after} if after else {}))
+        assert client.get('/venues', query_string=query).status_code == 200
+        after = pages[-1]['next_after']
+        if after is None:
+            return [page['areas'] for page in pages]
+
+
+# Pages follow the (state, city, name) order the areas are grouped in, so
+# paging through keeps every venue once, in order, and an area only
+# continues from the end of one page onto the start of the next.
+def test_venue_pages_keep_areas_together(client, monkeypatch):
+    # Inserted out of listing order, so id order differs from it.
+    for name, city, state in [
+        ('Zeta Club', 'Oakland', 'CA'), ('Blue Note', 'Austin', 'TX'), ('Alpha Bar', 'Oakland', 'CA'),
+        ('Mid Hall', 'Berkeley', 'CA'), ('Cave', 'Oakland', 'CA'), ('Echo', 'Austin', 'TX'),
+        ("Joe's \u00c9tage / 2", 'Oakland', 'CA'), ('Annex', 'Berkeley', 'CA'), ('Zeta Club', 'Oakland', 'CA'),
+    ]:
+        db.session.add(Venue(name=name, city=city, state=state, address='1 Main St', phone='555-0100',
+                             image_link='http://example.com/venue.png'))
+    db.session.commit()
+    expected = [
+        (venue.state, venue.city, venue.name, venue.id)
+        for venue in Venue.query.filter(Venue.city != 'N/A')
+        .order_by(Venue.state, Venue.city, Venue.name, Venue.id)
+    ]
+
+    pages = listing_pages(client, monkeypatch, 2)
+    assert len(pages) == 5
+    listed = [
+        (area['state'], area['city'], venue['name'], venue['id'])
+        for areas in pages for area in areas for venue in area['venues']
+    ]
+    assert listed == expected
+
+    seen = set()
+    for number, page in enumerate(pages):
+        areas = [(area['state'], area['city']) for area in page]
+        assert len(set(areas)) == len(areas)
+        # Only the first area of a page may have been listed before, and
+        # then only as the last area of the previous page.
+        assert seen.isdisjoint(areas[1:])
+        if areas[0] in seen:
+            assert areas[0] == (pages[number - 1][-1]['state'], pages[number - 1][-1]['city'])
+        seen.update(areas)
+
+    oakland = listing_pages(client, monkeypatch, 2, city='Oakland', state='CA')
+    assert [venue['name'] for areas in oakland for area in areas for venue in area['venues']] == [
+        'Alpha Bar', 'Cave', "Joe's \u00c9tage / 2", 'Zeta Club', 'Zeta Club',
+    ]
+
+
+def test_venue_listing_rejects_a_malformed_cursor(client):
+    assert client.get('/venues', query_string={'after': 'not-a-cursor'}).status_code == 400
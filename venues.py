@@ -0,0 +1,331 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import sys
+from datetime import datetime
+from flask import Blueprint, render_template, request, flash, redirect, url_for, jsonify
+from sqlalchemy import tuple_
+from sqlalchemy.orm import selectinload
+from models import db, Venue, Show, genres_named, remove_entities
+from extensions import search_backend, response_cache, replicas
+from pages import listing_filters, page_size, venue_cursor, encode_venue_cursor, split_page
+from pages import entity_version, is_not_modified, versioned_response
+
+bp = Blueprint('venues', __name__)
+
+
+#----------------------------------------------------------------------------#
+# Controllers.
+#----------------------------------------------------------------------------#
+
+#  List Venues
+#  ----------------------------------------------------------------
+
+@bp.route('/venues')
+@response_cache.cached('venues')
+@replicas.read_only
+def venues():
+
+  data=[]
+  areas = {}
+
+  # One query for the page of venues and their stored upcoming show
+  # counts; the area grouping is done below so the page costs the same
+  # number of statements no matter how many venues or shows there are.
+  # Pages follow the area order, so an area is only ever split between
+  # the end of one page and the start of the next.
+  local_venues = (
+    db.session.query(
+      Venue.id,
+      Venue.name,
+      Venue.city,
+      Venue.state,
+      Venue.upcoming_show_count
+    )
+    .filter(Venue.city != "N/A")
+    .order_by(Venue.state, Venue.city, Venue.name, Venue.id)
+  )
+
+  local_venues = listing_filters(local_venues, Venue)
+
+  after = venue_cursor()
+  if after is not None:
+    local_venues = local_venues.filter(tuple_(Venue.state, Venue.city, Venue.name, Venue.id) > after)
+
+  limit = page_size()
+  local_venues, has_next = split_page(local_venues.limit(limit + 1).all(), limit)
+
+  for venue in local_venues:
+
+    location = (venue.city, venue.state)
+
+    if location not in areas:
+      areas[location] = {
+        "city": venue.city,
+        "state": venue.state,
+        "venues": []
+      }
+      data.append(areas[location])
+
+    venue_data = {
+      "id": venue.id,
+      "name": venue.name,
+      "num_upcoming_shows": venue.upcoming_show_count,
+    }
+
+    areas[location]["venues"].append(venue_data)
+
+  next_after = encode_venue_cursor(local_venues[-1]) if has_next else None
+
+  return render_template('pages/venues.html', areas=data, next_after=next_after);
+
+
+#  Search Venues
+#  ----------------------------------------------------------------
+
+@bp.route('/venues/search', methods=['POST'])
+@replicas.read_only
+def search_venues():
+
+  search_term = request.form.get('search_term', '')
+
+  count, data = search_backend.search(Venue, search_term, page_size())
+
+  response={
+    "count": count,
+    "data": data
+  }
+
+  return render_template('pages/search_venues.html', results=response, search_term=request.form.get('search_term', ''))
+
+
+#  Display Venue
+#  ----------------------------------------------------------------
+
+@bp.route('/venues/<int:venue_id>')
+@response_cache.cached()
+@replicas.read_only
+def show_venue(venue_id):
+
+  etag, last_modified = entity_version(Venue, venue_id)
+  if is_not_modified(etag, last_modified):
+    return versioned_response(('', 304), etag, last_modified)
+
+  # The venue, its shows and each show's artist come back from one
+  # query plus a single selectin load, instead of a lookup per show.
+  venue = (
+    db.session.query(Venue)
+    .options(selectinload(Venue.shows).joinedload(Show.artist))
+    .filter(Venue.id == venue_id)
+    .first_or_404()
+  )
+
+  shows_past = []
+  shows_upcoming = []
+
+  now = datetime.now()
+
+  for show in venue.shows:
+
+    show_info = {
+      "id": show.id,
+      "artist_id": show.artist.id,
+      "artist_name": show.artist.name,
+      "artist_image_link": show.artist.image_link,
+      "start_time": show.date
+    }
+
+    if show.date < now:
+      shows_past.append(show_info)
+    else:
+      shows_upcoming.append(show_info)
+
+  response_cache.tag(
+    'venue:{}'.format(venue.id),
+    'venue-shows:{}'.format(venue.id),
+    *('artist:{}'.format(show.artist_id) for show in venue.shows)
+  )
+
+  # The page lists both past and upcoming shows, so the lists are built
+  # anyway and the counts are taken from them rather than from the
+  # stored counters: those only move a show to the past at the next
+  # `flask shows rollover`, while the lists split at the current time,
+  # and each heading must match the list under it.
+  shows_past_len = len(shows_past)
+  shows_upcoming_len = len(shows_upcoming)
+
+  data={
+    "id": venue.id,
+    "name": venue.name,
+    "genres": [genre.name for genre in venue.genres],
+    "address": venue.address,
+    "city": venue.city,
+    "state": venue.state,
+    "phone": venue.phone,
+    "website": venue.website_link,
+    "facebook_link": venue.facebook_link,
+    "seeking_talent": venue.seeking,
+    "seeking_description": venue.seeking_comment,
+    "image_link": venue.image_link,
+    "past_shows": shows_past,
+    "upcoming_shows": shows_upcoming,
+    "past_shows_count": shows_past_len,
+    "upcoming_shows_count": shows_upcoming_len
+  } 
+
+  return versioned_response(render_template('pages/show_venue.html', venue=data), etag, last_modified)
+
+
+#  Create Venue
+#  ----------------------------------------------------------------
+
+@bp.route('/venues/create', methods=['GET'])
+def create_venue_form():
+  from forms import VenueForm
+  form = VenueForm()
+  return render_template('forms/new_venue.html', form=form)
+
+@bp.route('/venues/create', methods=['POST'])
+def create_venue_submission():
+  from forms import VenueForm
+
+  form = VenueForm(request.form)
+
+  error = False
+
+  try:
+    venue = Venue(
+      name =              form.name.data,
+      city =              form.city.data,
+      state =             form.state.data,
+      address =           form.address.data,
+      phone =             form.phone.data,
+      genres =            genres_named(form.genres.data),
+      image_link =        form.image_link.data,
+      facebook_link =     form.facebook_link.data,
+      website_link =      form.website_link.data,
+      seeking =           form.seeking_talent.data,
+      seeking_comment =   form.seeking_description.data
+    )
+
+    db.session.add(venue)
+    db.session.commit()
+
+    flash('Venue ' + venue.name + ' was successfully listed!')
+  except:
+    db.session.rollback()
+    error=True
+    flash('An error occurred. Venue could not be listed.')
+    print(sys.exc_info())
+  finally:
+    db.session.close()
+  if error:
+    return render_template('pages/home.html')
+  else:
+    return redirect(url_for('venues.show_venue', venue_id=venue.id))
+
+
+#  Delete Venue
+#  ----------------------------------------------------------------
+
+@bp.route('/venues/<venue_id>', methods=['DELETE'])
+def delete_venue(venue_id):
+
+  error = False
+
+  try:
+    remove_entities(Venue, [venue_id])
+    db.session.commit()
+    flash('Venue deleted successfully!')
+  except:
+    db.session.rollback()
+    error = True
+    flash('There was a problem deleting the venue!!')
+    print(sys.exc_info())
+  finally:
+    db.session.close()
+  if error:
+    return jsonify({ 'success': False })
+  else:
+    return jsonify({ 'success': True })
+
+
+#  Update Venue
+#  ----------------------------------------------------------------
+
+@bp.route('/venues/<int:venue_id>/edit', methods=['GET'])
+def edit_venue(venue_id):
+  from forms import VenueForm
+
+  venue = Venue.query.get(venue_id)
+
+  form = VenueForm(
+    name =                  venue.name,
+    city =                  venue.city,
+    state =                 venue.state,
+    address =               venue.address,
+    phone =                 venue.phone,
+    genres =                [genre.name for genre in venue.genres],
+    image_link =            venue.image_link,
+    facebook_link =         venue.facebook_link,
+    website_link =          venue.website_link,
+    seeking_talent =        venue.seeking,
+    seeking_description =   venue.seeking_comment
+  )
+  
+  print(form.name.data)
+
+  return render_template('forms/edit_venue.html', form=form, venue=venue)
+
+@bp.route('/venues/<int:venue_id>/edit', methods=['POST'])
+def edit_venue_submission(venue_id):
+  from forms import VenueForm
+
+  form = VenueForm(request.form)
+  venue = Venue.query.get(venue_id)
+  
+  error = False
+
+  venue_update = Venue(
+    name =              form.name.data,
+    city =              form.city.data,
+    state =             form.state.data,
+    address =           form.address.data,
+    phone =             form.phone.data,
+    genres =            genres_named(form.genres.data),
+    image_link =        form.image_link.data,
+    facebook_link =     form.facebook_link.data,
+    website_link =      form.website_link.data,
+    seeking =           form.seeking_talent.data,
+    seeking_comment =   form.seeking_description.data
+  )
+
+  try:
+    venue.name =              venue_update.name
+    venue.city =              venue_update.city
+    venue.state =             venue_update.state
+    venue.address =           venue_update.address
+    venue.phone =             venue_update.phone
+    venue.genres =            venue_update.genres
+    venue.image_link =        venue_update.image_link
+    venue.facebook_link =     venue_update.facebook_link
+    venue.website_link =      venue_update.website_link
+    venue.seeking =           venue_update.seeking
+    venue.seeking_comment =   venue_update.seeking_comment
+    venue.updated_at =        datetime.utcnow()
+
+    db.session.commit()
+
+    flash('Venue ' + venue.name + ' was successfully updated!')
+  except:
+    db.session.rollback()
+    error = True
+    flash('An error occured. The venue could not be updated.')
+    print(sys.exc_info())
+  finally:
+    db.session.close()
+  if error:
+    return render_template('/venues/' + venue_id + '/edit')
+  else: 
+    return redirect(url_for('venues.show_venue', venue_id=venue_id))
@@ -0,0 +1,76 @@
+#----------------------------------------------------------------------------#
+# Template warm-up.
+#----------------------------------------------------------------------------#
+
+# Compiled templates are kept as Jinja bytecode under
+# TEMPLATE_BYTECODE_CACHE_DIR and shared by every worker, so only the
+# first process to load a template after a deploy compiles it. Filling the
+# cache at build time leaves nothing to compile at all:
+#
+#   flask templates warm
+#
+# With TEMPLATES_PRERENDER set, create_app() also renders the main pages
+# once before returning, which loads the templates into the worker and
+# fills the formatting, search and fragment caches before real traffic.
+# Set it for web workers only: CLI commands build the app too.
+
+import os
+import time
+
+from jinja2 import FileSystemBytecodeCache
+
+DEFAULT_PATHS = ('/', '/venues', '/artists', '/shows')
+
+
+def configure_bytecode_cache(app):
+    directory = app.config.get('TEMPLATE_BYTECODE_CACHE_DIR')
+    if not directory:
+        return
+    os.makedirs(directory, exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory)
+
+
+# Loads every template under templates/, compiling (and, with the
+# bytecode cache on, storing) any that aren't compiled yet.
+def compile_templates(app):
+    names = app.jinja_env.list_templates()
+    for name in names:
+        app.jinja_env.get_template(name)
+    return names
+
+
+def warm_paths(app):
+    from models import db, Venue, Artist
+
+    paths = list(app.config.get('TEMPLATES_WARM_PATHS') or DEFAULT_PATHS)
+    with app.app_context():
+        for model, prefix in ((Venue, '/venues/'), (Artist, '/artists/')):
+            entity_id = (db.session.query(model.id).filter(model.sentinel.is_(None))
+                         .order_by(model.id).limit(1).scalar())
+            if entity_id is not None:
+                paths.append('{}{}'.format(prefix, entity_id))
+        db.session.remove()
+    return paths
+
+
+# Returns [(path, status, milliseconds)]; failures are logged, not raised,
+# so a worker still starts when the database is briefly unavailable.
+def prerender(app):
+    try:
+        paths = warm_paths(app)
+    except Exception:
+        app.logger.exception('Template warm-up could not list pages')
+        paths = list(app.config.get('TEMPLATES_WARM_PATHS') or DEFAULT_PATHS)
+
+    client = app.test_client()
+    results = []
+    for path in paths:
+        started = time.perf_counter()
+        try:
+            status = client.get(path).status_code
+        except Exception:
+            app.logger.exception('Template warm-up failed for %s', path)
+            status = None
+        results.append((path, status, (time.perf_counter() - started) * 1000))
+    app.logger.info('Warmed %s', ', '.join('{} {} ({:.0f} ms)'.format(*result) for result in results))
+    return results